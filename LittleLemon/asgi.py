@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "LittleLemon.settings")
+os.environ.setdefault("LITTLELEMON_ASYNC_READS", "1")
 
 application = get_asgi_application()
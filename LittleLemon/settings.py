@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "LittleLemonAPI.instrumentation.InstrumentationMiddleware",
+    "LittleLemonAPI.profiler.QueryProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,6 +89,32 @@ DATABASES = {
     }
 }
 
+# SQLite production profile (LittleLemonAPI/sqlite.py): WAL and tuning pragmas on every
+# connection, persistent connections and write transactions that take the lock up front.
+SQLITE_PRODUCTION = os.environ.get('LITTLELEMON_SQLITE_PRODUCTION') == '1'
+
+SQLITE_PRAGMAS = {
+    'journal_mode' : 'WAL',
+    'synchronous' : 'NORMAL',
+    'mmap_size' : 268435456,
+    'cache_size' : -65536,
+    'temp_store' : 'MEMORY',
+}
+
+# BEGIN IMMEDIATE takes the write lock when a transaction starts, so a writer in another
+# worker process waits up to `timeout` seconds for it instead of failing with "database is locked".
+SQLITE_OPTIONS = {
+    'transaction_mode' : 'IMMEDIATE',
+    'timeout' : 20,
+}
+
+if SQLITE_PRODUCTION:
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": SQLITE_OPTIONS,
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -126,19 +155,81 @@ INTERNAL_IPS = [
     '127.0.0.1'
 ]
 
+# Addresses allowed to scrape /api/metrics without a token (the Prometheus scraper).
+# Empty by default: only managers can read the metrics until the scraper is listed here.
+METRICS_ALLOWED_IPS = []
+
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS' : [
         'rest_framework.filters.OrderingFilter',
         'rest_framework.filters.SearchFilter',
     ],
+    # orjson when installed, DRF's stdlib json otherwise (see LittleLemonAPI/renderers.py).
+    'DEFAULT_RENDERER_CLASSES' : [
+        'LittleLemonAPI.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES' : [
+        'LittleLemonAPI.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS' : 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE' : 3,
     'DEFAULT_AUTHENTICATION_CLASSES' : [
-        'rest_framework.authentication.TokenAuthentication',
+        'LittleLemonAPI.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon':'2/minute',
         'user':'5/minute'
     },
-}
\ No newline at end of file
+}
+
+# Menu catalog caching (see LittleLemonAPI/cache.py). The catalog version lives in the
+# VERSION_ALIAS cache, which must be shared (Redis, Memcached, database) across workers.
+CATALOG_CACHE = {
+    'BACKEND' : 'lru',
+    'MAX_ENTRIES' : 1024,
+    'VERSION_ALIAS' : 'default',
+}
+
+# Request metrics and sampled request logging (see LittleLemonAPI/instrumentation.py).
+INSTRUMENTATION = {
+    'LOG_SAMPLE_RATE' : 0.01,
+    'SLOW_REQUEST_MS' : 500,
+}
+
+# Repeated (N+1) and slow query detection on a sample of requests (see LittleLemonAPI/profiler.py).
+QUERY_PROFILER = {
+    'SAMPLE_RATE' : 0.01,
+    'REPEAT_THRESHOLD' : 5,
+    'SLOW_QUERY_MS' : 100,
+    'RAISE' : False,
+}
+
+# Seconds a user's resolved groups stay in the cache (see LittleLemonAPI/roles.py).
+ROLE_CACHE_TTL = 60
+
+# Seconds before the dispatch load table is reloaded from the database (see LittleLemonAPI/dispatch.py).
+DISPATCH_LOAD_TTL = 60
+
+# Stored responses of POST /api/orders retries (see LittleLemonAPI/idempotency.py).
+IDEMPOTENCY_KEYS = {
+    'TTL' : 86400,
+    'PURGE_INTERVAL' : 3600,
+    'PURGE_BATCH_SIZE' : 1000,
+}
+
+# Resolved API tokens (see LittleLemonAPI/authentication.py). Other workers may accept a
+# revoked token for up to LOCAL_TTL seconds.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES' : 10000,
+    'LOCAL_TTL' : 5,
+    'TTL' : 300,
+    'SHARED_ALIAS' : None,
+}
+
+# Serve the read endpoints (menu items, cart, orders) with native async views.
+# LittleLemon/asgi.py turns this on; under WSGI the sync DRF views are used.
+ASYNC_READ_ENDPOINTS = os.environ.get('LITTLELEMON_ASYNC_READS') == '1'
@@ -2,12 +2,28 @@ from django.contrib import admin
 
 # Register your models here.
 from .models import Category, MenuItem, Cart, Order, OrderItem
+from . import cart_summary
 
 # Register your models here.
 # admin.site.register(Category)
 class CartAdmin(admin.ModelAdmin):
   list_display = ("user", "menu_item", "quantity",)
 
+  # Admin edits bypass the API, so the cart summary is recomputed for the affected users.
+  def save_model(self, request, obj, form, change):
+    super().save_model(request, obj, form, change)
+    cart_summary.rebuild(obj.user_id)
+
+  def delete_model(self, request, obj):
+    super().delete_model(request, obj)
+    cart_summary.rebuild(obj.user_id)
+
+  def delete_queryset(self, request, queryset):
+    user_ids = set(queryset.values_list("user_id", flat=True))
+    super().delete_queryset(request, queryset)
+    for user_id in user_ids:
+      cart_summary.rebuild(user_id)
+
 admin.site.register(MenuItem)
 admin.site.register(Cart, CartAdmin)
 admin.site.register(Order)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Min, Sum, Value, When
+
+from .models import DailyMenuItemSales, DailySales, MenuItem, Order, OrderItem
+from .sqlite import write_transaction
+
+
+"""
+[[Sales rollups]]
+
+Purpose:
+    - Keeps one DailySales row per order date (orders, items sold, revenue) and one
+    DailyMenuItemSales row per (date, menu item) (quantity, revenue), so the sales
+    reports read a few hundred rollup rows for a year instead of every OrderItem.
+
+    - checkout.place_order() adds each new order, the Order pre_delete signal
+    (signals.py) takes deleted orders back out. Both run inside the write's
+    transaction. rebuild() recomputes a date range from the orders themselves,
+    one chunk of days per transaction (`manage.py rebuild_sales_rollups`).
+
+    - Daily revenue is the sum of Order.total, per item revenue the sum of OrderItem.price.
+"""
+def _add(model, lookup, **deltas):
+    updated = model.objects.filter(**lookup).update(**{name: F(name) + value for name, value in deltas.items()})
+    if updated or any(value < 0 for value in deltas.values()):
+        # Nothing to take back from a day or item that has no rollup row.
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another request created the row first.
+        _add(model, lookup, **deltas)
+
+
+def _apply(order_date, sign, total, items):
+    order_date = Order._meta.get_field('date').to_python(order_date)
+    _add(
+        DailySales, {'date': order_date},
+        order_count=sign, item_count=sign * sum(item['quantity'] for item in items), revenue=sign * Decimal(total),
+    )
+    lines = {}
+    for item in items:
+        quantity, revenue = lines.get(item['menu_item_id'], (0, Decimal('0.00')))
+        lines[item['menu_item_id']] = (quantity + item['quantity'], revenue + Decimal(item['price']))
+    if lines:
+        _add_lines(order_date, sign, lines)
+
+
+def _add_lines(order_date, sign, lines):
+    """
+    Adds {menu_item_id: (quantity, revenue)} to the item rollups of a day with one
+    UPDATE for the rows that exist and one bulk insert for the others.
+    """
+    rows = DailyMenuItemSales.objects.filter(date=order_date)
+    existing = set(rows.filter(menu_item_id__in=lines).values_list('menu_item_id', flat=True))
+    if existing:
+        rows.filter(menu_item_id__in=existing).update(**{
+            name: F(name) + Case(
+                *[When(menu_item_id=menu_item_id, then=Value(sign * lines[menu_item_id][position])) for menu_item_id in existing],
+                output_field=DailyMenuItemSales._meta.get_field(name),
+            )
+            for position, name in enumerate(['quantity', 'revenue'])
+        })
+    missing = [menu_item_id for menu_item_id in lines if menu_item_id not in existing]
+    if not missing or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            DailyMenuItemSales.objects.bulk_create([
+                DailyMenuItemSales(date=order_date, menu_item_id=menu_item_id, quantity=lines[menu_item_id][0], revenue=lines[menu_item_id][1])
+                for menu_item_id in missing
+            ])
+    except IntegrityError:
+        # Another request created some of the rows first.
+        _add_lines(order_date, sign, {menu_item_id: lines[menu_item_id] for menu_item_id in missing})
+
+
+def order_placed(order, order_items):
+    _apply(order.date, 1, order.total, [
+        {'menu_item_id': item.menu_item_id, 'quantity': item.quantity, 'price': item.price} for item in order_items
+    ])
+
+
+def order_removed(order):
+    _apply(order.date, -1, order.total, list(OrderItem.objects.filter(order=order).values('menu_item_id', 'quantity', 'price')))
+    # Rows left empty are dropped, as a rebuild would not create them.
+    DailySales.objects.filter(date=order.date, order_count=0).delete()
+    DailyMenuItemSales.objects.filter(date=order.date, quantity=0).delete()
+
+
+def rebuild(date_from=None, date_to=None, chunk_days=31):
+    """
+    Recomputes the rollups of every day between date_from and date_to (default: the
+    first and last order dates). Yields (chunk start, chunk end, orders counted) per chunk.
+    """
+    bounds = Order.objects.aggregate(first=Min('date'), last=Max('date'))
+    date_from = date_from or bounds['first']
+    date_to = date_to or bounds['last']
+    if date_from is None or date_to is None:
+        return
+
+    start = date_from
+    while start <= date_to:
+        end = min(start + timedelta(days=chunk_days - 1), date_to)
+        with write_transaction():
+            DailySales.objects.filter(date__range=(start, end)).delete()
+            DailyMenuItemSales.objects.filter(date__range=(start, end)).delete()
+
+            days = {
+                row['date']: DailySales(date=row['date'], order_count=row['order_count'], revenue=row['revenue'])
+                for row in Order.objects.filter(date__range=(start, end))
+                    .values('date').annotate(order_count=Count('id'), revenue=Sum('total')).order_by()
+            }
+            lines = []
+            for row in (OrderItem.objects.filter(order__date__range=(start, end))
+                    .values('order__date', 'menu_item_id').annotate(quantity=Sum('quantity'), revenue=Sum('price')).order_by()):
+                days[row['order__date']].item_count += row['quantity']
+                lines.append(DailyMenuItemSales(
+                    date=row['order__date'], menu_item_id=row['menu_item_id'], quantity=row['quantity'], revenue=row['revenue'],
+                ))
+            DailySales.objects.bulk_create(days.values())
+            DailyMenuItemSales.objects.bulk_create(lines)
+        yield start, end, sum(day.order_count for day in days.values())
+        start = end + timedelta(days=1)
+
+
+def daily_sales(date_from=None, date_to=None):
+    days = DailySales.objects.order_by('date')
+    if date_from is not None:
+        days = days.filter(date__gte=date_from)
+    if date_to is not None:
+        days = days.filter(date__lte=date_to)
+    return list(days.values('date', 'order_count', 'item_count', 'revenue'))
+
+
+def top_menu_items(date_from=None, date_to=None, limit=10):
+    lines = DailyMenuItemSales.objects.all()
+    if date_from is not None:
+        lines = lines.filter(date__gte=date_from)
+    if date_to is not None:
+        lines = lines.filter(date__lte=date_to)
+    top = list(
+        lines.values('menu_item_id')
+            .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+            .order_by('-quantity', '-revenue', 'menu_item_id')[:limit]
+    )
+    # Titles are looked up for the top rows only, not joined into the aggregation.
+    titles = dict(MenuItem.objects.filter(pk__in=[row['menu_item_id'] for row in top]).values_list('id', 'title'))
+    return [{'menu_item_id': row['menu_item_id'], 'title': titles.get(row['menu_item_id']), **row} for row in top]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LittlelemonapiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "LittleLemonAPI"
+
+    def ready(self):
+        from . import instrumentation, profiler, signals, sqlite
+        instrumentation.install()
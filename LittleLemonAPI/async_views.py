@@ -0,0 +1,188 @@
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import AnonymousUser
+from django.forms.models import model_to_dict
+from django.http import HttpResponse
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import aauthenticate_credentials
+from .cache import catalog_cache
+from .cart_summary import aget_summary
+from .compact import cart_rows, cart_lines
+from .filters import FilterSetFieldsBackend
+from .models import Cart, MenuItem, Order
+from .pagination import KeysetPagination
+from .renderers import json_renderer
+from .roles import aget_roles, MANAGER, DELIVERY_CREW
+from . import compact, views
+
+
+"""
+[[Async read endpoints]]
+
+Purpose:
+    - Native async GET handlers for the read-heavy endpoints, used when the site is
+    served through LittleLemon/asgi.py (ASYNC_READ_ENDPOINTS). They authenticate,
+    check roles and query with the async ORM, so a read never takes a threadpool hop.
+    Each handler returns exactly what the sync DRF view would return.
+
+    Anything off the common path (other methods, the browsable API, ?format=,
+    bad or missing credentials, unusual query parameters, a page out of range,
+    a filtered, ordered or searched menu listing that is not cached yet) raises
+    Delegate and is served by the sync DRF view through sync_to_async, so error
+    responses stay identical. The plain menu listing is built here on a miss.
+"""
+class Delegate(Exception):
+    pass
+
+
+def render(data, status=200, headers=None):
+    return HttpResponse(json_renderer().render(data), status=status, content_type='application/json', headers=headers)
+
+
+async def authenticate(request, required=True):
+    header = request.headers.get('Authorization', '').split()
+    if not header:
+        if required:
+            raise Delegate
+        return AnonymousUser(), None
+    if len(header) != 2 or header[0].lower() != 'token':
+        raise Delegate
+    credentials = await aauthenticate_credentials(header[1])
+    if credentials is None:
+        raise Delegate
+    return credentials
+
+
+def drf_request(request, user, token):
+    # A DRF Request with the user already resolved, for serializers, filters and paginators.
+    wrapped = Request(request, authenticators=())
+    wrapped.user = user
+    wrapped.auth = token
+    return wrapped
+
+
+def async_reads(async_get, sync_view):
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET' and 'format' not in request.GET and 'text/html' not in request.headers.get('Accept', ''):
+            try:
+                return await async_get(request, *args, **kwargs)
+            except Delegate:
+                pass
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+    # DRF views are csrf exempt, and so is the sync view this may delegate to.
+    view.csrf_exempt = True
+    return view
+
+
+def page_number(request):
+    # Only ?page= is handled here, anything else goes to the sync view.
+    if set(request.GET) - {'page'}:
+        raise Delegate
+    try:
+        return int(request.GET.get('page', 1))
+    except ValueError:
+        raise Delegate
+
+
+async def paginate(request, page, queryset, rows, build, user_id):
+    """
+    PageNumberPagination of the compact rows (compact.py) with the async ORM,
+    in the shape of get_paginated_response(). An out of range page is delegated.
+    """
+    page_size = api_settings.PAGE_SIZE
+    count = await queryset.acount()
+    if page < 1 or (page > 1 and (page - 1) * page_size >= count):
+        raise Delegate
+    page_rows = [row async for row in rows(queryset)[(page - 1) * page_size:page * page_size]]
+
+    url = request.build_absolute_uri()
+    has_next = page * page_size < count
+    previous = None
+    if page > 1:
+        previous = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return {
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+        'previous': previous,
+        'results': build(page_rows, user_id),
+    }
+
+
+async def menu_items_get(request):
+    user, token = await authenticate(request, required=False)
+    if set(request.GET) - {'page'}:
+        # Filters, ordering and search: served from the cache, or built by the sync view.
+        data, hit = catalog_cache.get(request), True
+        if data is None:
+            raise Delegate
+    else:
+        page = page_number(request)
+        data, hit = await catalog_cache.aget_or_set(request, lambda: paginate(
+            request, page, MenuItem.objects.order_by('id'), compact.menu_item_rows, compact.menu_items, user.pk,
+        ))
+    user_id = user.pk
+    if isinstance(data, dict) and 'results' in data:
+        data = {**data, 'results': [{**item, 'user': user_id} for item in data['results']]}
+    else:
+        data = [{**item, 'user': user_id} for item in data]
+    return render(data, headers={'X-Catalog-Cache': 'HIT' if hit else 'MISS'})
+
+
+async def cart_get(request):
+    page = page_number(request)
+    user, token = await authenticate(request)
+    data = await paginate(request, page, Cart.objects.filter(user=user).order_by('id'), cart_rows, cart_lines, user.pk)
+    data['summary'] = await aget_summary(user.id)
+    return render(data)
+
+
+async def orders_get(request):
+    user, token = await authenticate(request)
+    roles = await aget_roles(user)
+    if MANAGER in roles:
+        orders = Order.objects.all()
+    elif DELIVERY_CREW in roles:
+        orders = Order.objects.filter(delivery_crew__isnull=False)
+    else:
+        orders = Order.objects.filter(user=user)
+
+    wrapped = drf_request(request, user, token)
+    try:
+        orders = FilterSetFieldsBackend().filter_queryset(wrapped, orders, views.OrderView)
+    except ValidationError:
+        raise Delegate
+    paginator = KeysetPagination()
+    try:
+        page = paginator.get_page_queryset(orders.values(), wrapped, views.OrderView)
+    except NotFound:
+        raise Delegate
+    rows = [row async for row in page]
+    return render(paginator.get_paginated_response(paginator.set_page(rows)).data)
+
+
+async def single_order_get(request, id):
+    user, token = await authenticate(request)
+    roles = await aget_roles(user)
+    if MANAGER in roles or DELIVERY_CREW in roles:
+        return render({"message":"401 - Forbidden."}, status=401)
+    try:
+        order = await Order.objects.aget(pk=id)
+    except Order.DoesNotExist:
+        raise Delegate
+    if order.user_id != user.id:
+        return render({"message":"403 - Unauthorized."}, status=403)
+    return render({
+        "message":"200 - OK.",
+        "data": model_to_dict(order)
+    })
+
+
+menu_items = async_reads(menu_items_get, views.MenuItemsView.as_view())
+cart = async_reads(cart_get, views.CartView.as_view())
+orders = async_reads(orders_get, views.OrderView.as_view())
+single_order = async_reads(single_order_get, views.SingleOrderView.as_view())
@@ -0,0 +1,142 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .cache import LRUBackend
+
+
+"""
+[[Cached token authentication]]
+
+Purpose:
+    - Drop-in replacement for TokenAuthentication that keeps resolved tokens in a
+    bounded in-process LRU (and optionally a shared Django cache), so a warm
+    request authenticates without touching the authtoken_token table.
+    Entries are dropped when the token is deleted (djoser logout), when the user
+    logs out or when the user is saved, from the local tier of the process that
+    made the change and from the shared tier, once the change commits (signals.py).
+
+    - Other processes only learn about a revoked token when their local entry
+    expires, so LOCAL_TTL is the revocation window and is kept to a few seconds.
+    The shared tier (SHARED_ALIAS) keeps entries for TTL seconds and is cleared
+    on revocation, so with it a local miss still avoids the database.
+
+Settings:
+    TOKEN_AUTH_CACHE = {
+        "MAX_ENTRIES": 10000,
+        "LOCAL_TTL": 5,           # seconds, the revocation window of other processes
+        "TTL": 300,               # seconds, shared tier
+        "SHARED_ALIAS": None,     # a CACHES alias for the shared tier, or None
+    }
+"""
+def _config():
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {})
+
+
+class TokenCache:
+    def __init__(self, max_entries=10000, ttl=300, shared_alias=None, local_ttl=5):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local = LRUBackend(max_entries)
+        self.shared_alias = shared_alias
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _shared_key(self, key):
+        return f"token:{key}"
+
+    def get_local(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            expires_at, user, token = entry
+            if expires_at > time.monotonic():
+                return user, token
+            self.local.delete(key)
+        return None
+
+    def set_local(self, key, user, token):
+        self.local.set(key, (time.monotonic() + self.local_ttl, user, token))
+
+    def get(self, key):
+        entry = self.get_local(key)
+        if entry is not None:
+            return entry
+        if self.shared is not None:
+            entry = self.shared.get(self._shared_key(key))
+            if entry is not None:
+                self.set_local(key, *entry)
+                return entry
+        return None
+
+    def set(self, key, user, token):
+        self.set_local(key, user, token)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), (user, token), self.ttl)
+
+    async def aget(self, key):
+        entry = self.get_local(key)
+        if entry is None and self.shared is not None:
+            entry = await self.shared.aget(self._shared_key(key))
+            if entry is not None:
+                self.set_local(key, *entry)
+        return entry
+
+    async def aset(self, key, user, token):
+        self.set_local(key, user, token)
+        if self.shared is not None:
+            await self.shared.aset(self._shared_key(key), (user, token), self.ttl)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        self.local.clear()
+
+
+token_cache = TokenCache(
+    _config().get('MAX_ENTRIES', 10000),
+    _config().get('TTL', 300),
+    _config().get('SHARED_ALIAS'),
+    _config().get('LOCAL_TTL', 5),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            cached = (user, token)
+        # Hand out copies so per-request state set on the user never leaks into the cache.
+        user, token = cached
+        return copy.copy(user), token
+
+
+async def aauthenticate_credentials(key):
+    """
+    Async counterpart of CachedTokenAuthentication.authenticate_credentials for the
+    async read views. Returns None (instead of raising) for unknown or inactive
+    tokens so the caller can hand the request to the sync view for the error response.
+    """
+    cached = await token_cache.aget(key)
+    if cached is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        if not token.user.is_active:
+            return None
+        await token_cache.aset(key, token.user, token)
+        cached = (token.user, token)
+    user, token = cached
+    return copy.copy(user), token
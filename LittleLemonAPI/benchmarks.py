@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+"""
+[[Benchmark helpers]]
+
+Purpose:
+    - Shared helpers for the bench_* management commands.
+    The benchmarks never touch the configured database, they run against a
+    throwaway test database created for the duration of the run.
+"""
+@contextmanager
+def isolated_database(verbosity=0, test_name=None):
+    """
+    test_name picks the test database name, e.g. a file path to benchmark
+    SQLite on disk instead of the default in-memory database.
+    """
+    setup_test_environment()
+    if test_name is not None:
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, repeat, setup=None):
+    """
+    Calls func() repeat times, running setup() untimed before each call.
+    Returns the latencies in milliseconds and the number of queries of the last call.
+    """
+    latencies = []
+    queries = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            func()
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries = len(captured)
+    return latencies, queries
+
+
+def summarize(latencies):
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def use_async_read_endpoints(enabled):
+    """
+    Re-imports the URL confs with ASYNC_READ_ENDPOINTS switched, so one run can
+    compare the sync views with the async read views.
+    """
+    import importlib
+    from django.conf import settings
+    from django.urls import clear_url_caches
+    import LittleLemon.urls
+    import LittleLemonAPI.urls
+
+    settings.ASYNC_READ_ENDPOINTS = enabled
+    importlib.reload(LittleLemonAPI.urls)
+    importlib.reload(LittleLemon.urls)
+    clear_url_caches()
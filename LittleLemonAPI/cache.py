@@ -0,0 +1,215 @@
+import random
+from collections import OrderedDict
+from threading import Lock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+"""
+[[Catalog cache]]
+
+Purpose:
+    - Read-through cache for the menu catalog listing (GET /api/menu-items).
+    Entries are keyed on the catalog version plus the normalized request URL,
+    so bumping the version on any MenuItem/Category write makes every cached
+    page unreachable at once. Stale entries then age out of the backend.
+
+    - The version counter always lives in a Django cache (VERSION_ALIAS), even when
+    the entries are kept in-process, so a write in one worker invalidates the
+    listings, rendered items and price index of every worker. With several
+    workers that alias must be a shared backend (Redis, Memcached, database);
+    the default LocMemCache is only shared within one process.
+    A counter lost from the cache restarts at a random value, so entries stored
+    under an earlier version are never served again.
+
+Settings:
+    CATALOG_CACHE = {
+        "BACKEND": "lru",          # "lru" (in-process) or "django" (any CACHES alias)
+        "MAX_ENTRIES": 1024,       # lru only
+        "MAX_ITEMS": 4096,         # rendered single items, always in-process
+        "ALIAS": "default",        # django only
+        "TIMEOUT": 300,            # django only, seconds
+        "VERSION_ALIAS": "default",
+    }
+"""
+class LRUBackend:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    def __init__(self, alias="default", timeout=300):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def build_backend(config):
+    if config.get("BACKEND", "lru") == "django":
+        return DjangoCacheBackend(config.get("ALIAS", "default"), config.get("TIMEOUT", 300))
+    return LRUBackend(config.get("MAX_ENTRIES", 1024))
+
+
+class CatalogCache:
+    VERSION_KEY = "catalog:version"
+
+    def __init__(self, backend, version_alias="default"):
+        self.backend = backend
+        self.version_alias = version_alias
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def versions(self):
+        return caches[self.version_alias]
+
+    def version(self):
+        version = self.versions.get(self.VERSION_KEY)
+        if version is None:
+            # Never expires. Another process may add it first, so read back what was kept.
+            self.versions.add(self.VERSION_KEY, random.getrandbits(48), None)
+            version = self.versions.get(self.VERSION_KEY)
+        return version
+
+    def bump(self):
+        self.version()
+        try:
+            return self.versions.incr(self.VERSION_KEY)
+        except ValueError:
+            # Evicted in between: a fresh random version invalidates as well.
+            return self.version()
+
+    def key(self, request, version=None):
+        version = self.version() if version is None else version
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        return f"catalog:{version}:{request.build_absolute_uri(request.path)}?{query}"
+
+    def count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, request):
+        data = self.backend.get(self.key(request))
+        if data is not None:
+            self.count(True)
+        return data
+
+    def get_or_set(self, request, build):
+        # Stored under the version read before building, so a write during the build
+        # leaves the page under a version that is already out of date.
+        key = self.key(request)
+        data = self.backend.get(key)
+        if data is not None:
+            self.count(True)
+            return data, True
+        self.count(False)
+        data = build()
+        self.backend.set(key, data)
+        return data, False
+
+    async def aget_or_set(self, request, abuild):
+        """
+        get_or_set() for the async views: abuild is a coroutine function.
+        """
+        key = self.key(request)
+        data = self.backend.get(key)
+        if data is not None:
+            self.count(True)
+            return data, True
+        self.count(False)
+        data = await abuild()
+        self.backend.set(key, data)
+        return data, False
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "version": self.version()}
+
+
+catalog_cache = CatalogCache(
+    build_backend(getattr(settings, "CATALOG_CACHE", {})),
+    getattr(settings, "CATALOG_CACHE", {}).get("VERSION_ALIAS", "default"),
+)
+
+
+"""
+[[Rendered menu item cache]]
+
+Purpose:
+    - Keeps the rendered JSON bytes of each MenuItem (with its nested Category)
+    for GET /api/menu-items/<pk>. MenuItemSerializer starts with the requesting
+    user's id, so the cached bytes are everything after that field and the
+    response is b'{"user":<id>,' + body. The ETag is a digest of the body plus
+    the user id, so it is strong: equal ETags mean byte-identical responses.
+
+    - Each entry carries the catalog version read before it was rendered, and an
+    entry from another version is a miss. The version is shared by all workers and
+    bumped again when a write commits (signals.py), so a write anywhere stops every
+    worker from serving (or answering 304 to) the old bytes, including bytes
+    rendered from the old row while the write was still uncommitted. The writing
+    process also drops the entries of the items it wrote once the write commits.
+"""
+class RenderedItemCache:
+    def __init__(self, max_entries=4096):
+        self.backend = LRUBackend(max_entries)
+
+    def get(self, pk, version):
+        entry = self.backend.get(pk)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1:]
+
+    def set(self, pk, version, body, digest):
+        self.backend.set(pk, (version, body, digest))
+
+    def invalidate(self, *pks):
+        for pk in pks:
+            self.backend.delete(pk)
+
+    def clear(self):
+        self.backend.clear()
+
+
+menu_item_cache = RenderedItemCache(getattr(settings, "CATALOG_CACHE", {}).get("MAX_ITEMS", 4096))
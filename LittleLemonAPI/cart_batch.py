@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+from .models import Cart
+from .prices import price_index
+from .serializers import CartOperationSerializer
+from .sqlite import write_transaction
+from . import cart_summary
+
+
+MAX_OPERATIONS = 100
+# Cart.quantity is a SmallIntegerField, Cart.price a DecimalField(max_digits=6, decimal_places=2).
+MAX_QUANTITY = 32767
+MAX_PRICE = Decimal('9999.99')
+
+
+"""
+[[Batch cart update]]
+
+Purpose:
+    - Applies a list of {op, menu_item_id, quantity} operations to a user's cart
+    in one transaction: "set" sets the quantity (0 removes the line),
+    "increment" adds to it (a negative quantity takes away, down to removing
+    the line) and "remove" drops the line. Operations on the same menu item
+    apply in order.
+
+    - The menu items are validated and priced from the price index (prices.py).
+    The lines touched are read with one query, then written with one upsert
+    (bulk_create with update_conflicts on (menu_item, user)) and one delete,
+    and the cart summary is moved by the difference with one UPDATE.
+    Lines are priced at the menu item's current price, as a single add does.
+
+    - At most MAX_OPERATIONS operations per request. If any operation is invalid
+    nothing is written.
+"""
+def apply_operations(user, rows):
+    """
+    Returns (results, success): one result per operation, the errors when not successful.
+    """
+    results, valid = [], []
+    for index, row in enumerate(rows):
+        serializer = CartOperationSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+            results.append({"row": index, "status": "ok"})
+        else:
+            results.append({"row": index, "status": "error", "errors": serializer.errors})
+
+    prices = price_index.get_many({data['menu_item_id'] for _, data in valid})
+    for index, data in valid:
+        if data['menu_item_id'] not in prices:
+            results[index] = {"row": index, "status": "error", "errors": {"menu_item_id": ["Menu item not found."]}}
+    if any(result['status'] == 'error' for result in results):
+        return results, False
+
+    with write_transaction():
+        current = {
+            cart_item.menu_item_id: cart_item
+            for cart_item in Cart.objects.filter(user=user, menu_item_id__in=prices)
+        }
+        quantities = {menu_item_id: cart_item.quantity for menu_item_id, cart_item in current.items()}
+        last_row = {}
+        for index, data in valid:
+            menu_item_id = data['menu_item_id']
+            if data['op'] == 'set':
+                quantities[menu_item_id] = data['quantity']
+            elif data['op'] == 'increment':
+                quantities[menu_item_id] = max(quantities.get(menu_item_id, 0) + data['quantity'], 0)
+            else:
+                quantities[menu_item_id] = 0
+            last_row[menu_item_id] = index
+
+        upserts, removed = [], []
+        for menu_item_id, quantity in quantities.items():
+            price = prices[menu_item_id].price
+            line = current.get(menu_item_id)
+            if quantity == 0:
+                if line is not None:
+                    removed.append(line)
+            elif quantity > MAX_QUANTITY or price * quantity > MAX_PRICE:
+                index = last_row[menu_item_id]
+                results[index] = {"row": index, "status": "error", "errors": {"quantity": ["Quantity too large."]}}
+            elif line is None or (line.quantity, line.unit_price) != (quantity, price):
+                upserts.append(Cart(user=user, menu_item_id=menu_item_id, quantity=quantity, unit_price=price, price=price * quantity))
+        if any(result['status'] == 'error' for result in results):
+            return results, False
+
+        if upserts:
+            Cart.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=['menu_item', 'user'],
+                update_fields=['quantity', 'unit_price', 'price'],
+            )
+        if removed:
+            Cart.objects.filter(pk__in=[line.pk for line in removed]).delete()
+
+        before = [current[new.menu_item_id] for new in upserts if new.menu_item_id in current] + removed
+        lines = sum(new.menu_item_id not in current for new in upserts) - len(removed)
+        items = sum(new.quantity for new in upserts) - sum(line.quantity for line in before)
+        amount = sum(new.price for new in upserts) - sum(line.price for line in before)
+        if lines or items or amount:
+            cart_summary.apply_delta(user.id, lines, items, amount)
+    return results, True
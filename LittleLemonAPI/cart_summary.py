@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Cart, CartSummary
+
+
+"""
+[[Cart summary]]
+
+Purpose:
+    - Keeps one CartSummary row per user (line count, item count, subtotal)
+    up to date as cart lines are added or removed, so reading the cart totals
+    is a single primary-key lookup instead of a pass over the cart.
+    The subtotal is the sum of the stored Cart.price of each line, which is
+    exactly what checkout charges.
+"""
+def apply_delta(user_id, lines, items, amount):
+    updated = CartSummary.objects.filter(user_id=user_id).update(
+        line_count=F('line_count') + lines,
+        item_count=F('item_count') + items,
+        subtotal=F('subtotal') + amount,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            CartSummary.objects.create(user_id=user_id, line_count=lines, item_count=items, subtotal=amount)
+    except IntegrityError:
+        # Another request created the row first.
+        apply_delta(user_id, lines, items, amount)
+
+
+def line_added(cart):
+    apply_delta(cart.user_id, 1, cart.quantity, cart.price)
+
+
+def cleared(user_id):
+    CartSummary.objects.filter(user_id=user_id).update(line_count=0, item_count=0, subtotal=0)
+
+
+def rebuild(user_id):
+    totals = Cart.objects.filter(user_id=user_id).aggregate(
+        line_count=Count('id'), item_count=Sum('quantity'), subtotal=Sum('price'),
+    )
+    summary, _ = CartSummary.objects.update_or_create(user_id=user_id, defaults={
+        'line_count': totals['line_count'],
+        'item_count': totals['item_count'] or 0,
+        'subtotal': totals['subtotal'] or Decimal('0.00'),
+    })
+    return summary
+
+
+def rebuild_many(user_ids):
+    """
+    rebuild() for several users with one aggregate query and one upsert.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    totals = {
+        row['user_id']: row
+        for row in Cart.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            line_count=Count('id'), item_count=Sum('quantity'), subtotal=Sum('price'),
+        )
+    }
+    empty = {'line_count': 0, 'item_count': 0, 'subtotal': Decimal('0.00')}
+    CartSummary.objects.bulk_create(
+        [
+            CartSummary(
+                user_id=user_id,
+                line_count=totals.get(user_id, empty)['line_count'],
+                item_count=totals.get(user_id, empty)['item_count'],
+                subtotal=totals.get(user_id, empty)['subtotal'],
+            )
+            for user_id in user_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['line_count', 'item_count', 'subtotal'],
+    )
+
+
+def get_summary(user_id):
+    return _as_dict(user_id, CartSummary.objects.filter(user_id=user_id).first())
+
+
+async def aget_summary(user_id):
+    return _as_dict(user_id, await CartSummary.objects.filter(user_id=user_id).afirst())
+
+
+def _as_dict(user_id, summary):
+    if summary is None:
+        summary = CartSummary(user_id=user_id, subtotal=Decimal('0.00'))
+    return {
+        "line_count": summary.line_count,
+        "item_count": summary.item_count,
+        "subtotal": summary.subtotal,
+    }
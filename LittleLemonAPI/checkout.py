@@ -0,0 +1,58 @@
+from django.forms.models import model_to_dict
+
+from .models import Cart, CartSummary, Order, OrderItem
+from . import analytics, cart_summary
+from .sqlite import write_transaction
+
+
+"""
+[[Checkout]]
+
+Purpose:
+    - Turns the cart of a user into an Order with its OrderItems.
+    The cart lines are read once (without their menu items), the order items are
+    written with a single bulk insert and the cart is emptied with a single
+    delete, all inside one transaction. The order total is taken from the
+    user's CartSummary and the order is added to the sales rollups (analytics.py).
+    The cost is a fixed number of queries regardless of the cart size.
+
+    - Lines were validated and priced from the price index (prices.py) when they
+    were added to the cart, and deleting a menu item deletes its cart lines, so
+    every line read here points at an existing item. Lines are charged the
+    unit_price and price stored on them, which is what the cart summary adds up.
+    An empty cart places nothing and returns (None, []).
+"""
+def place_order(user, order_date):
+    with write_transaction():
+        cart = list(Cart.objects.filter(user=user))
+        if not cart:
+            return None, []
+
+        # The maintained cart summary is the order total. If it ever drifted from
+        # the cart lines (e.g. rows edited outside the API) it is rebuilt first.
+        summary = CartSummary.objects.filter(user_id=user.id).first()
+        if summary is None or summary.line_count != len(cart):
+            summary = cart_summary.rebuild(user.id)
+
+        new_order = Order.objects.create(
+            user=user,
+            total=summary.subtotal,
+            date=order_date,
+        )
+
+        order_items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=new_order,
+                menu_item_id=cart_item.menu_item_id,
+                quantity=cart_item.quantity,
+                unit_price=cart_item.unit_price,
+                price=cart_item.price,
+            )
+            for cart_item in cart
+        ])
+        analytics.order_placed(new_order, order_items)
+
+        Cart.objects.filter(pk__in=[cart_item.pk for cart_item in cart]).delete()
+        cart_summary.cleared(user.id)
+
+    return new_order, [model_to_dict(order_item) for order_item in order_items]
@@ -0,0 +1,76 @@
+from .instrumentation import timed_serializer
+
+
+MENU_ITEM_COLUMNS = ('id', 'title', 'price', 'featured', 'category_id', 'category__slug', 'category__title')
+CART_COLUMNS = ('user_id', 'id', 'quantity') + tuple(f'menu_item__{column}' for column in MENU_ITEM_COLUMNS)
+
+
+# DRF's DecimalField output. Values read from a DecimalField already carry its decimal places.
+decimal_string = '{:f}'.format
+
+
+"""
+[[Compact list serializers]]
+
+Purpose:
+    - Read-only fast path for the list responses. Rows are fetched with
+    values_list() in a fixed column order and turned straight into plain dicts,
+    skipping the per-field work of a ModelSerializer (field binding, get_attribute,
+    to_representation, the write-only fields and validators).
+
+    - The output is the same as MenuItemSerializer / CartSerializer
+    with DRF's default settings (decimals as strings, ISO 8601
+    dates), key order included, so the rendered JSON is byte-identical.
+    tests.CompactSerializerTest holds the two side by side.
+
+    - Quirks of the serializers are kept on purpose:
+    the "user" of a menu item is the requesting user,
+    and a cart line's unit_price and price come from the menu item's current
+    price, the price being an unquantized Decimal.
+
+    - Usage: rows = menu_item_rows(queryset); paginate rows if needed; menu_items(rows, user_id).
+"""
+def menu_item_rows(queryset):
+    return queryset.values_list(*MENU_ITEM_COLUMNS)
+
+
+def cart_rows(queryset):
+    return queryset.values_list(*CART_COLUMNS)
+
+
+@timed_serializer
+def menu_items(rows, user_id):
+    return [
+        {
+            'user': user_id,
+            'id': pk,
+            'title': title,
+            'price': decimal_string(price),
+            'featured': featured,
+            'category': {'id': category_id, 'slug': slug, 'title': category_title},
+        }
+        for pk, title, price, featured, category_id, slug, category_title in rows
+    ]
+
+
+@timed_serializer
+def cart_lines(rows, user_id):
+    return [
+        {
+            'user': cart_user_id,
+            'id': pk,
+            'quantity': quantity,
+            'unit_price': decimal_string(price),
+            'price': quantity * price,
+            'menu_item': {
+                'user': user_id,
+                'id': menu_item_id,
+                'title': title,
+                'price': decimal_string(price),
+                'featured': featured,
+                'category': {'id': category_id, 'slug': slug, 'title': category_title},
+            },
+        }
+        for cart_user_id, pk, quantity, menu_item_id, title, price, featured, category_id, slug, category_title in rows
+    ]
+
@@ -0,0 +1,173 @@
+import heapq
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Order
+from .roles import DELIVERY_CREW
+from .sqlite import write_transaction
+
+
+AUTO_ASSIGN_BATCH_SIZE = 500
+
+
+"""
+[[Dispatch queue]]
+
+Purpose:
+    - The work queue of the delivery crew. An order is pending for a crew member
+    while it is assigned to them and not delivered (status = 0).
+    pending_orders() reads one crew member's queue through the
+    (delivery_crew, status, date) index.
+
+    - assign() hands many orders to one crew member with a single UPDATE.
+    auto_assign() spreads unassigned, undelivered orders over the whole crew,
+    each order going to the member with the fewest pending orders at that moment.
+    It writes one UPDATE per crew member per AUTO_ASSIGN_BATCH_SIZE orders. Each
+    UPDATE re-checks that its orders are still unassigned and undelivered, so an
+    order assigned meanwhile is left alone, and only the rows it changed are counted.
+
+    - The per-crew pending counts live in an in-memory LoadTable, loaded with one
+    GROUP BY query and kept current on commit by assign()/auto_assign() and by
+    the Order signals (signals.py) for single order saves and deletes.
+    It is reloaded after DISPATCH_LOAD_TTL seconds so that changes made by
+    other processes are picked up. The reload query runs outside the table's lock.
+"""
+def pending(delivery_crew_id, status):
+    return delivery_crew_id is not None and not status
+
+
+def pending_orders(crew_id):
+    # status IN (0) rather than status = False, which SQLite cannot match to the index.
+    return Order.objects.filter(delivery_crew_id=crew_id, status__in=[False])
+
+
+class LoadTable:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.lock = Lock()
+        self.loads = None
+        self.loaded_at = 0
+        # Moves on every apply()/clear(), to tell whether a load raced with one.
+        self.generation = 0
+
+    def load(self):
+        return {
+            row['delivery_crew']: row['pending']
+            for row in Order.objects.filter(delivery_crew__isnull=False, status__in=[False])
+                .values('delivery_crew').annotate(pending=Count('id')).order_by()
+        }
+
+    def snapshot(self):
+        with self.lock:
+            if self.loads is not None and time.monotonic() - self.loaded_at <= self.ttl:
+                return dict(self.loads)
+            generation = self.generation
+        # The query runs outside the lock, so committing writers never wait on it.
+        loads = self.load()
+        with self.lock:
+            # A delta applied during the load may or may not be in it: use it once, keep it only if none was.
+            if self.generation == generation:
+                self.loads, self.loaded_at = loads, time.monotonic()
+        return dict(loads)
+
+    def apply(self, deltas):
+        with self.lock:
+            self.generation += 1
+            if self.loads is None:
+                return
+            for crew_id, delta in deltas.items():
+                self.loads[crew_id] = max(self.loads.get(crew_id, 0) + delta, 0)
+
+    def record(self, deltas):
+        # Applied once the transaction commits, so rolled back writes never count.
+        deltas = {crew_id: delta for crew_id, delta in deltas.items() if delta}
+        if deltas:
+            transaction.on_commit(lambda: self.apply(deltas))
+
+    def moved(self, before, after):
+        """
+        Records an order going from (delivery_crew_id, status) `before` to `after`.
+        """
+        deltas = {}
+        if pending(*before):
+            deltas[before[0]] = deltas.get(before[0], 0) - 1
+        if pending(*after):
+            deltas[after[0]] = deltas.get(after[0], 0) + 1
+        self.record(deltas)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.loads = None
+
+
+load_table = LoadTable(getattr(settings, 'DISPATCH_LOAD_TTL', 60))
+
+
+def unassigned_orders():
+    return Order.objects.filter(delivery_crew__isnull=True, status__in=[False])
+
+
+def crew_ids():
+    return list(User.objects.filter(groups__name=DELIVERY_CREW, is_active=True).values_list('id', flat=True))
+
+
+def assign(order_ids, crew_id):
+    """
+    Assigns the existing orders among order_ids to crew_id.
+    Returns the ids that were assigned.
+    """
+    with write_transaction():
+        before = list(Order.objects.filter(pk__in=order_ids).values_list('id', 'delivery_crew_id', 'status'))
+        Order.objects.filter(pk__in=[order_id for order_id, _, _ in before]).update(delivery_crew_id=crew_id)
+        deltas = {}
+        for _, old_crew_id, order_status in before:
+            if pending(old_crew_id, order_status):
+                deltas[old_crew_id] = deltas.get(old_crew_id, 0) - 1
+            if pending(crew_id, order_status):
+                deltas[crew_id] = deltas.get(crew_id, 0) + 1
+        load_table.record(deltas)
+    return [order_id for order_id, _, _ in before]
+
+
+def auto_assign(order_ids=None):
+    """
+    Assigns unassigned, undelivered orders (all of them, or those among order_ids)
+    to the least loaded crew members, oldest order first.
+    Returns {crew_id: [order ids]}.
+    """
+    crew = crew_ids()
+    if not crew:
+        return {}
+    with write_transaction():
+        orders = unassigned_orders()
+        if order_ids is not None:
+            orders = orders.filter(pk__in=order_ids)
+        orders = list(orders.order_by('date', 'id').values_list('id', flat=True))
+
+        loads = load_table.snapshot()
+        heap = [(loads.get(crew_id, 0), crew_id) for crew_id in crew]
+        heapq.heapify(heap)
+        assignments, counts = {}, {}
+        # One UPDATE per crew member and batch keeps every statement within
+        # SQLite's bound-parameter limit, however large the backlog.
+        for start in range(0, len(orders), AUTO_ASSIGN_BATCH_SIZE):
+            batch = {}
+            for order_id in orders[start:start + AUTO_ASSIGN_BATCH_SIZE]:
+                load, crew_id = heapq.heappop(heap)
+                batch.setdefault(crew_id, []).append(order_id)
+                heapq.heappush(heap, (load + 1, crew_id))
+            for crew_id, assigned in batch.items():
+                # Re-checked in the UPDATE: an order assigned or delivered since it was read is left alone.
+                updated = unassigned_orders().filter(pk__in=assigned).update(delivery_crew_id=crew_id)
+                if updated != len(assigned):
+                    assigned = list(Order.objects.filter(pk__in=assigned, delivery_crew_id=crew_id).values_list('id', flat=True))
+                assignments.setdefault(crew_id, []).extend(assigned)
+                counts[crew_id] = counts.get(crew_id, 0) + updated
+        load_table.record(counts)
+    return {crew_id: assigned for crew_id, assigned in assignments.items() if assigned}
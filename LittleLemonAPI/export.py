@@ -0,0 +1,62 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import OrderItem
+
+
+ORDER_FIELDS = ['id', 'user_id', 'delivery_crew_id', 'status', 'total', 'date']
+ORDER_ITEM_FIELDS = ['id', 'menu_item_id', 'quantity', 'unit_price', 'price']
+CSV_HEADER = ['order_' + name for name in ORDER_FIELDS] + ['item_' + name for name in ORDER_ITEM_FIELDS]
+
+
+"""
+[[Order export]]
+
+Purpose:
+    - Generators behind GET /api/orders/export.
+    Orders are read with .iterator(chunk_size) in (date, id) order and the order
+    items of each chunk are fetched with one IN query, so memory stays bounded by
+    chunk_size no matter how many orders match.
+"""
+def iter_orders(orders, chunk_size=2000):
+    chunk = []
+    for order in orders.order_by('date', 'id').values(*ORDER_FIELDS).iterator(chunk_size=chunk_size):
+        chunk.append(order)
+        if len(chunk) == chunk_size:
+            yield from _with_items(chunk)
+            chunk = []
+    if chunk:
+        yield from _with_items(chunk)
+
+
+def _with_items(orders):
+    items = {order['id']: [] for order in orders}
+    for item in OrderItem.objects.filter(order_id__in=list(items)).order_by('id').values('order_id', *ORDER_ITEM_FIELDS):
+        items[item.pop('order_id')].append(item)
+    for order in orders:
+        order['items'] = items[order['id']]
+        yield order
+
+
+def ndjson_lines(orders, chunk_size=2000):
+    for order in iter_orders(orders, chunk_size):
+        yield json.dumps(order, cls=DjangoJSONEncoder) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(orders, chunk_size=2000):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    empty_item = [''] * len(ORDER_ITEM_FIELDS)
+    for order in iter_orders(orders, chunk_size):
+        order_row = [order[name] for name in ORDER_FIELDS]
+        if not order['items']:
+            yield writer.writerow(order_row + empty_item)
+        for item in order['items']:
+            yield writer.writerow(order_row + [item[name] for name in ORDER_ITEM_FIELDS])
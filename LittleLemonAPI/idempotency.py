@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .renderers import json_renderer
+from .sqlite import write_transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+"""
+[[Idempotency keys]]
+
+Purpose:
+    - Makes a POST safe to retry. A client sends an Idempotency-Key header
+    (any string up to 255 characters, unique per request it means to make);
+    the first request runs and its rendered response is stored under
+    (user, key) together with a fingerprint of the request, in the same
+    transaction as the write itself. A retry with the same key is answered
+    from the store, with an Idempotent-Replayed: true header, and never
+    reaches the view. Reusing a key for a different request is a 422.
+
+    - Two attempts racing on the same key both run, the second one fails on the
+    (user, key) unique constraint, rolls back everything it wrote and replays
+    the first one's response.
+
+    - Keys expire after TTL seconds. Expired keys are deleted in batches by a
+    background thread, started at most once per PURGE_INTERVAL seconds after a
+    key is stored, or by `manage.py purge_idempotency_keys`.
+
+Settings:
+    IDEMPOTENCY_KEYS = {
+        "TTL": 86400,             # seconds
+        "PURGE_INTERVAL": 3600,   # seconds
+        "PURGE_BATCH_SIZE": 1000,
+    }
+"""
+HEADER = 'Idempotency-Key'
+
+
+def _config():
+    return getattr(settings, 'IDEMPOTENCY_KEYS', {})
+
+
+def fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(f'{request.method} {request.path}\n{body}'.encode(), digest_size=16).hexdigest()
+
+
+def replay(record):
+    response = HttpResponse(record.response, status=record.status_code, content_type='application/json')
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def lookup(user, key, request_fingerprint):
+    """
+    Returns the response to replay for key, a 422 when the key was used for
+    another request, or None when the request has to run.
+    """
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.expires_at <= timezone.now():
+        record.delete()
+        return None
+    if record.fingerprint != request_fingerprint:
+        return Response(
+            {"message":"422 - Idempotency-Key was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return replay(record)
+
+
+def store(request, key, request_fingerprint, response):
+    renderer = request.accepted_renderer if getattr(request.accepted_renderer, 'format', None) == 'json' else json_renderer()
+    IdempotencyKey.objects.create(
+        user=request.user,
+        key=key,
+        fingerprint=request_fingerprint,
+        status_code=response.status_code,
+        response=renderer.render(response.data).decode(),
+        expires_at=timezone.now() + timedelta(seconds=_config().get('TTL', 86400)),
+    )
+    transaction.on_commit(purger.maybe_start)
+
+
+def idempotent(request, handler):
+    """
+    Runs handler() (which returns a Response) at most once per Idempotency-Key.
+    Requests without the header run as usual.
+    """
+    key = request.headers.get(HEADER)
+    if key is None:
+        return handler()
+    if not key or len(key) > IdempotencyKey._meta.get_field('key').max_length:
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+
+    request_fingerprint = fingerprint(request)
+    response = lookup(request.user, key, request_fingerprint)
+    if response is not None:
+        return response
+    try:
+        with write_transaction():
+            response = handler()
+            store(request, key, request_fingerprint, response)
+    except IntegrityError:
+        # A concurrent attempt with the same key committed first.
+        response = lookup(request.user, key, request_fingerprint)
+        if response is None:
+            raise
+    return response
+
+
+def purge_expired(batch_size=None):
+    """
+    Deletes expired keys, batch_size rows per transaction. Returns the number deleted.
+    """
+    batch_size = batch_size or _config().get('PURGE_BATCH_SIZE', 1000)
+    now = timezone.now()
+    deleted = 0
+    while True:
+        with write_transaction():
+            ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+            if ids:
+                IdempotencyKey.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
+
+
+class Purger:
+    def __init__(self, interval=3600):
+        self.interval = interval
+        self.lock = threading.Lock()
+        # The first purge runs one interval after startup, not on the first request.
+        self.last_run = time.monotonic()
+
+    def maybe_start(self):
+        with self.lock:
+            if time.monotonic() - self.last_run < self.interval:
+                return
+            self.last_run = time.monotonic()
+        threading.Thread(target=self.run, name='idempotency-key-purge', daemon=True).start()
+
+    def run(self):
+        try:
+            deleted = purge_expired()
+            logger.debug("expired idempotency keys purged", extra={"deleted": deleted})
+        except Exception:
+            logger.exception("idempotency key purge failed")
+        finally:
+            connection.close()
+
+
+purger = Purger(_config().get('PURGE_INTERVAL', 3600))
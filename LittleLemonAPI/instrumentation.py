@@ -0,0 +1,245 @@
+import logging
+import random
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+
+"""
+[[Request instrumentation]]
+
+Purpose:
+    - InstrumentationMiddleware times every request and records, per route
+    (the URL name from urls.py) and method: a latency histogram, the number of
+    DB queries and the time spent in them, the time spent in DRF serializers
+    (.data) and the response size. /api/metrics serves them in the Prometheus
+    text format.
+
+    - The per-request counters live in a ContextVar, so queries made from
+    sync_to_async threads under ASGI are counted too. DB queries are timed by an
+    execute wrapper installed on every new connection, serializers by wrapping
+    Serializer.data and ListSerializer.data once at startup (install()) and the
+    compact list serializers (compact.py) with timed_serializer.
+
+    - Each request is logged as one structured line, for a LOG_SAMPLE_RATE share
+    of requests and for every request slower than SLOW_REQUEST_MS.
+
+Settings:
+    INSTRUMENTATION = {
+        "LOG_SAMPLE_RATE": 0.01,
+        "SLOW_REQUEST_MS": 500,
+    }
+"""
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _config():
+    return getattr(settings, 'INSTRUMENTATION', {})
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+_current = ContextVar('littlelemon_request_stats', default=None)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += perf_counter() - start
+        stats.queries += 1
+
+
+@receiver(connection_created)
+def install_db_wrapper(sender, connection, **kwargs):
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
+
+
+def timed_serializer(func):
+    """
+    Counts the time spent in func as serializer time. Wraps Serializer.data and
+    ListSerializer.data (install()) and the compact serializers (compact.py).
+    """
+    @wraps(func)
+    def timed(*args, **kwargs):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return func(*args, **kwargs)
+        stats.serializing = True
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serializing = False
+            stats.serializer_time += perf_counter() - start
+    timed.instrumented = True
+    return timed
+
+
+def _timed_data(data):
+    return property(timed_serializer(data.fget))
+
+
+def install():
+    from rest_framework.serializers import ListSerializer, Serializer
+    for serializer_class in (Serializer, ListSerializer):
+        if not getattr(serializer_class.data.fget, 'instrumented', False):
+            serializer_class.data = _timed_data(serializer_class.data)
+
+
+class RouteMetrics:
+    __slots__ = ('buckets', 'count', 'duration', 'queries', 'db_time', 'serializer_time', 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = Lock()
+        self.routes = {}
+
+    def record(self, route, method, status, duration, stats, size):
+        with self.lock:
+            metrics = self.routes.get((route, method))
+            if metrics is None:
+                metrics = self.routes[(route, method)] = RouteMetrics()
+            metrics.buckets[bisect_left(BUCKETS, duration)] += 1
+            metrics.count += 1
+            metrics.duration += duration
+            metrics.queries += stats.queries
+            metrics.db_time += stats.db_time
+            metrics.serializer_time += stats.serializer_time
+            metrics.response_bytes += size
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.routes = {}
+
+    def render(self):
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                '# HELP littlelemon_request_duration_seconds Request latency by route.',
+                '# TYPE littlelemon_request_duration_seconds histogram',
+            ]
+            for (route, method), metrics in routes:
+                labels = f'route="{route}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), metrics.buckets):
+                    cumulative += count
+                    lines.append(f'littlelemon_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'littlelemon_request_duration_seconds_sum{{{labels}}} {metrics.duration:.6f}')
+                lines.append(f'littlelemon_request_duration_seconds_count{{{labels}}} {metrics.count}')
+            for name, kind, help, attribute in (
+                ('requests_total', 'counter', 'Requests by route and status code.', None),
+                ('db_queries_total', 'counter', 'DB queries run by requests.', 'queries'),
+                ('db_duration_seconds_total', 'counter', 'Time spent in DB queries.', 'db_time'),
+                ('serializer_duration_seconds_total', 'counter', 'Time spent in DRF serializers.', 'serializer_time'),
+                ('response_bytes_total', 'counter', 'Response body bytes (streamed responses excluded).', 'response_bytes'),
+            ):
+                lines.append(f'# HELP littlelemon_{name} {help}')
+                lines.append(f'# TYPE littlelemon_{name} {kind}')
+                for (route, method), metrics in routes:
+                    labels = f'route="{route}",method="{method}"'
+                    if attribute is None:
+                        for status, count in sorted(metrics.statuses.items()):
+                            lines.append(f'littlelemon_{name}{{{labels},status="{status}"}} {count}')
+                    else:
+                        value = getattr(metrics, attribute)
+                        lines.append(f'littlelemon_{name}{{{labels}}} {value:.6f}' if isinstance(value, float) else f'littlelemon_{name}{{{labels}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        config = _config()
+        self.sample_rate = config.get('LOG_SAMPLE_RATE', 0.01)
+        self.slow = config.get('SLOW_REQUEST_MS', 500) / 1000
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, perf_counter() - start)
+        return response
+
+    def finish(self, request, response, stats, duration):
+        match = request.resolver_match
+        route = match.view_name if match is not None and match.url_name else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        registry.record(route, request.method, response.status_code, duration, stats, size)
+        if duration >= self.slow or random.random() < self.sample_rate:
+            logger.info(
+                'request route=%s method=%s status=%s duration_ms=%.2f queries=%d db_ms=%.2f serializer_ms=%.2f bytes=%d',
+                route, request.method, response.status_code, duration * 1000,
+                stats.queries, stats.db_time * 1000, stats.serializer_time * 1000, size,
+                extra={'request_metrics': {
+                    'route': route,
+                    'method': request.method,
+                    'status': response.status_code,
+                    'duration_ms': round(duration * 1000, 3),
+                    'queries': stats.queries,
+                    'db_ms': round(stats.db_time * 1000, 3),
+                    'serializer_ms': round(stats.serializer_time * 1000, 3),
+                    'bytes': size,
+                }},
+            )
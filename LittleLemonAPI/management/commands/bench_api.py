@@ -0,0 +1,247 @@
+import datetime
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.contrib.auth.models import User, Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from LittleLemonAPI import cart_summary, urls
+from LittleLemonAPI.benchmarks import isolated_database, summarize
+from LittleLemonAPI.models import MenuItem, Cart, Order
+from LittleLemonAPI.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic dataset and runs scripted customer, manager and delivery crew scenarios "
+        "against every route of the API through an in-process client. Reports requests per second "
+        "(one client, sequential requests), p50/p95/p99 latency and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--menu-items", type=int, default=5000)
+        parser.add_argument("--customers", type=int, default=100_000)
+        parser.add_argument("--crew", type=int, default=50)
+        parser.add_argument("--orders", type=int, default=1_000_000)
+        parser.add_argument("--max-items-per-order", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=100)
+        parser.add_argument("--roles", nargs="+", choices=["customer", "manager", "crew"], default=["customer", "manager", "crew"])
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+        parser.add_argument("--baseline", help="A previous report to compare p50/p95 latency and queries against.")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def seed(self, options):
+        seeder = Seeder(options["seed"], options["batch_size"])
+        categories = seeder.categories(options["categories"])
+        menu_items = seeder.menu_items(options["menu_items"], categories)
+        customer_ids = seeder.users(options["customers"])
+        manager_id, = seeder.managers(1)
+        crew_ids = seeder.crew(options["crew"])
+        seeder.orders(options["orders"], customer_ids, crew_ids, options["max_items_per_order"])
+        seeder.finish()
+        users = User.objects.in_bulk([customer_ids[0], crew_ids[0], manager_id])
+        return users[customer_ids[0]], users[crew_ids[0]], users[manager_id], categories, menu_items
+
+    def scenarios(self, customer, crew, manager, categories, menu_items):
+        """
+        Returns the steps as (role, route name, method, path, data, setup).
+        path and data may be callables taking what setup() returned.
+        """
+        category = categories[0].pk
+        menu_item = menu_items[0]
+        promoted = User.objects.create(username="bench-promoted")
+        crew_order = (
+            Order.objects.filter(delivery_crew=crew).order_by("-date", "-id").first()
+            or Order.objects.create(user=customer, delivery_crew=crew, total=0, date=datetime.date(2023, 6, 14))
+        )
+        customer_order = Order.objects.filter(user=customer).first() or Order.objects.create(user=customer, total=0, date=datetime.date(2023, 6, 14))
+
+        def fill_cart():
+            Cart.objects.filter(user=customer).delete()
+            Cart.objects.bulk_create([
+                Cart(user=customer, menu_item=item, quantity=2, unit_price=item.price, price=item.price * 2)
+                for item in menu_items[:3]
+            ])
+            cart_summary.rebuild(customer.id)
+
+        def empty_cart():
+            Cart.objects.filter(user=customer).delete()
+            cart_summary.rebuild(customer.id)
+
+        def new_menu_item():
+            return MenuItem.objects.create(title="Bench item", price="5.00", featured=False, category=categories[0]).pk
+
+        def new_order():
+            return Order.objects.create(user=customer, total="10.00", date=datetime.date(2023, 6, 14)).pk
+
+        def new_orders():
+            return [order.pk for order in Order.objects.bulk_create([
+                Order(user=customer, total="10.00", date=datetime.date(2023, 6, 14)) for _ in range(10)
+            ])]
+
+        def add_to(group):
+            return lambda: Group.objects.get(name=group).user_set.add(promoted)
+
+        def remove_from(group):
+            return lambda: Group.objects.get(name=group).user_set.remove(promoted)
+
+        bulk = [
+            {"id": item.pk, "title": item.title, "price": str(item.price), "featured": item.featured, "category_id": item.category_id}
+            for item in menu_items[:20]
+        ]
+        return [
+            ("customer", "menu-items", "GET", "/api/menu-items", None, None),
+            ("customer", "menu-items", "GET", f"/api/menu-items?category={category}&ordering=price", None, None),
+            ("customer", "menu-items", "GET", "/api/menu-items?search=chick", None, None),
+            ("customer", "menu-item", "GET", f"/api/menu-items/{menu_item.pk}", None, None),
+            ("customer", "cart", "POST", "/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 1}, empty_cart),
+            ("customer", "cart", "GET", "/api/cart/menu-items", None, None),
+            ("customer", "cart-summary", "GET", "/api/cart/summary", None, None),
+            ("customer", "cart", "DELETE", "/api/cart/menu-items", None, fill_cart),
+            ("customer", "cart-batch", "POST", "/api/cart/menu-items/batch", [
+                {"op": "set", "menu_item_id": menu_items[0].pk, "quantity": 3},
+                {"op": "increment", "menu_item_id": menu_items[1].pk, "quantity": -1},
+                {"op": "remove", "menu_item_id": menu_items[2].pk},
+                {"menu_item_id": menu_items[3].pk, "quantity": 1},
+            ], fill_cart),
+            ("customer", "orders", "POST", "/api/orders", {"date": "2023-06-14"}, fill_cart),
+            ("customer", "orders", "GET", "/api/orders", None, None),
+            ("customer", "order", "GET", f"/api/orders/{customer_order.pk}", None, None),
+
+            ("manager", "menu-items", "POST", "/api/menu-items", {"title": "New item", "price": "6.00", "featured": False, "category_id": category}, None),
+            ("manager", "menu-items-bulk", "POST", "/api/menu-items/bulk", bulk, None),
+            ("manager", "menu-item", "PUT", f"/api/menu-items/{menu_item.pk}",
+                {"title": menu_item.title, "price": str(menu_item.price), "featured": menu_item.featured, "category_id": menu_item.category_id}, None),
+            ("manager", "menu-item", "PATCH", f"/api/menu-items/{menu_item.pk}", {"price": str(menu_item.price)}, None),
+            ("manager", "menu-item", "DELETE", lambda pk: f"/api/menu-items/{pk}", None, new_menu_item),
+            ("manager", "orders", "GET", "/api/orders", None, None),
+            ("manager", "orders", "GET", "/api/orders?status=false&ordering=-total", None, None),
+            ("manager", "orders-export", "GET", "/api/orders/export?date_from=2023-06-01&date_to=2023-06-07", None, None),
+            ("manager", "order", "PUT", f"/api/orders/{customer_order.pk}", {"delivery_crew_id": crew.pk, "status": False}, None),
+            ("manager", "order", "DELETE", lambda pk: f"/api/orders/{pk}", None, new_order),
+            ("manager", "dispatch-pending", "GET", f"/api/orders/dispatch/pending?delivery_crew_id={crew.pk}", None, None),
+            ("manager", "dispatch-assign", "POST", "/api/orders/dispatch/assign",
+                lambda ids: {"order_ids": ids, "delivery_crew_id": crew.pk}, new_orders),
+            ("manager", "dispatch-auto-assign", "POST", "/api/orders/dispatch/auto-assign", lambda ids: {"order_ids": ids}, new_orders),
+            ("manager", "sales-daily", "GET", "/api/reports/sales/daily?date_from=2023-01-01&date_to=2023-12-31", None, None),
+            ("manager", "sales-top-items", "GET", "/api/reports/sales/top-items?date_from=2023-01-01&date_to=2023-12-31", None, None),
+            ("manager", "managers", "GET", "/api/groups/manager/users", None, None),
+            ("manager", "managers", "POST", "/api/groups/manager/users", {"username": promoted.username}, remove_from("Manager")),
+            ("manager", "manager", "DELETE", f"/api/groups/manager/users/{promoted.pk}", None, add_to("Manager")),
+            ("manager", "delivery-crew", "GET", "/api/groups/delivery-crew/users", None, None),
+            ("manager", "delivery-crew", "POST", "/api/groups/delivery-crew/users", {"username": promoted.username}, remove_from("Delivery crew")),
+            ("manager", "delivery-crew-member", "DELETE", f"/api/groups/delivery-crew/users/{promoted.pk}", None, add_to("Delivery crew")),
+            ("manager", "metrics", "GET", "/api/metrics", None, None),
+
+            ("crew", "orders", "GET", "/api/orders", None, None),
+            ("crew", "dispatch-pending", "GET", "/api/orders/dispatch/pending", None, None),
+            ("crew", "order", "PATCH", f"/api/orders/{crew_order.pk}", {"status": True}, None),
+        ]
+
+    def run_step(self, client, method, path, data, setup, repeat):
+        latencies, queries, statuses = [], [], {}
+        for _ in range(repeat):
+            state = setup() if setup is not None else None
+            url = path(state) if callable(path) else path
+            payload = data(state) if callable(data) else data
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(client, method.lower())(url, payload, format="json")
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return {
+            "requests": repeat,
+            "rps": round(repeat / (sum(latencies) / 1000), 1),
+            **summarize(latencies),
+            "queries_per_request": round(sum(queries) / repeat, 2),
+            "max_queries": max(queries),
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    def compare(self, results, baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+        previous = {(result["role"], result["method"], result["path"]): result for result in baseline["results"]}
+        for result in results:
+            before = previous.get((result["role"], result["method"], result["path"]))
+            if before is None:
+                continue
+            result["baseline"] = {
+                "commit": baseline.get("commit"),
+                "p50_change_pct": round((result["p50_ms"] / before["p50_ms"] - 1) * 100, 1) if before["p50_ms"] else None,
+                "p95_change_pct": round((result["p95_ms"] / before["p95_ms"] - 1) * 100, 1) if before["p95_ms"] else None,
+                "queries_change": round(result["queries_per_request"] - before["queries_per_request"], 2),
+            }
+
+    def commit(self):
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.stdout.write(
+                f"seeding {options['menu_items']} menu items, {options['customers']} customers, {options['orders']} orders..."
+            )
+            seed_start = time.perf_counter()
+            customer, crew, manager, categories, menu_items = self.seed(options)
+            seed_seconds = time.perf_counter() - seed_start
+
+            steps = self.scenarios(customer, crew, manager, categories, menu_items)
+            missing = {pattern.name for pattern in urls.urlpatterns} - {route for _, route, _, _, _, _ in steps}
+            if missing:
+                raise CommandError(f"No benchmark scenario for: {', '.join(sorted(missing))}")
+
+            clients = {"customer": self.client_for(customer), "manager": self.client_for(manager), "crew": self.client_for(crew)}
+            results = []
+            for role, route, method, path, data, setup in steps:
+                if role not in options["roles"]:
+                    continue
+                # One untimed request warms the caches, as on a running server.
+                self.run_step(clients[role], method, path, data, setup, 1)
+                result = self.run_step(clients[role], method, path, data, setup, options["repeat"])
+                results.append({
+                    "role": role, "route": route, "method": method,
+                    "path": "<created per request>" if callable(path) else path,
+                    **result,
+                })
+                self.stdout.write(f"  {role} {method} {route}: p50 {result['p50_ms']} ms, {result['queries_per_request']} queries")
+
+        if options["baseline"]:
+            self.compare(results, options["baseline"])
+        report = {
+            "commit": self.commit(),
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "dataset": {
+                name: options[name] for name in ("categories", "menu_items", "customers", "crew", "orders", "max_items_per_order", "seed")
+            },
+            "seed_seconds": round(seed_seconds, 1),
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output + "\n")
+        self.stdout.write(output)
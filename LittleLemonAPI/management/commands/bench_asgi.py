@@ -0,0 +1,99 @@
+import asyncio
+import datetime
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from rest_framework.authtoken.models import Token
+
+from LittleLemonAPI import cart_summary
+from LittleLemonAPI.benchmarks import isolated_database, summarize, use_async_read_endpoints
+from LittleLemonAPI.models import Category, MenuItem, Cart, Order
+
+
+class Command(BaseCommand):
+    help = "Compares WSGI and ASGI throughput of the read endpoints at N concurrent connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=5000)
+
+    def seed(self):
+        customer = User.objects.create(username="customer")
+        category = Category.objects.create(slug="mains", title="Mains")
+        menu_items = MenuItem.objects.bulk_create([
+            MenuItem(title=f"Item {i}", price="8.00", featured=False, category=category) for i in range(200)
+        ])
+        Cart.objects.bulk_create([
+            Cart(user=customer, menu_item=menu_item, quantity=1, unit_price="8.00", price="8.00") for menu_item in menu_items[:5]
+        ])
+        cart_summary.rebuild(customer.id)
+        orders = Order.objects.bulk_create([
+            Order(user=customer, total=20, date=datetime.date(2023, 1, 1) + datetime.timedelta(days=i)) for i in range(500)
+        ])
+        token = Token.objects.create(user=customer).key
+        return token, [
+            "/api/menu-items",
+            "/api/cart/menu-items",
+            "/api/orders",
+            f"/api/orders/{orders[0].id}",
+        ]
+
+    def run_wsgi(self, urls, headers, options):
+        def call(i):
+            start = time.perf_counter()
+            Client().get(urls[i % len(urls)], headers=headers)
+            return (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            start = time.perf_counter()
+            latencies = list(pool.map(call, range(options["requests"])))
+            return latencies, time.perf_counter() - start
+
+    def run_asgi(self, urls, headers, options):
+        async def main():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(options["concurrency"])
+
+            async def call(i):
+                async with semaphore:
+                    start = time.perf_counter()
+                    await client.get(urls[i % len(urls)], headers=headers)
+                    return (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*[call(i) for i in range(options["requests"])])
+            return latencies, time.perf_counter() - start
+
+        return async_to_sync(main)()
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            token, urls = self.seed()
+            headers = {"Authorization": f"Token {token}"}
+            # Warm the catalog, token and role caches so every mode starts from the same state.
+            for url in urls:
+                Client().get(url, headers=headers)
+
+            results = []
+            for mode, async_reads, runner in [
+                ("wsgi, sync views", False, self.run_wsgi),
+                ("asgi, sync views", False, self.run_asgi),
+                ("asgi, async views", True, self.run_asgi),
+            ]:
+                use_async_read_endpoints(async_reads)
+                latencies, elapsed = runner(urls, headers, options)
+                results.append({
+                    "mode": mode,
+                    "concurrency": options["concurrency"],
+                    "requests": options["requests"],
+                    "rps": round(options["requests"] / elapsed, 1),
+                    **summarize(latencies),
+                })
+            use_async_read_endpoints(False)
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,40 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.benchmarks import isolated_database, measure, summarize
+from LittleLemonAPI.checkout import place_order
+from LittleLemonAPI import cart_summary
+from LittleLemonAPI.models import Category, MenuItem, Cart
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the checkout path (query count and p50/p99 latency against cart size)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20, 50, 100])
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            user = User.objects.create(username="bench-customer")
+            category = Category.objects.create(slug="bench", title="Bench")
+            menu_items = MenuItem.objects.bulk_create([
+                MenuItem(title=f"Item {i}", price="4.50", featured=False, category=category)
+                for i in range(max(options["sizes"]))
+            ])
+
+            results = []
+            for size in options["sizes"]:
+                def fill_cart():
+                    Cart.objects.bulk_create([
+                        Cart(user=user, menu_item=menu_item, quantity=2, unit_price=menu_item.price, price=menu_item.price)
+                        for menu_item in menu_items[:size]
+                    ])
+                    cart_summary.rebuild(user.id)
+
+                latencies, queries = measure(lambda: place_order(user, "2023-06-14"), options["repeat"], setup=fill_cart)
+                results.append({"cart_size": size, "queries": queries, **summarize(latencies)})
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,53 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from LittleLemonAPI.instrumentation import InstrumentationMiddleware, RequestStats, _current, db_wrapper, registry
+
+
+class Command(BaseCommand):
+    help = "Measures the per-request and per-query overhead of the instrumentation middleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100000)
+
+    def timed(self, func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n * 1_000_000
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        request = RequestFactory().get("/api/menu-items")
+        request.resolver_match = resolve("/api/menu-items")
+        response = HttpResponse(b'{"message":"200 - OK."}', content_type="application/json")
+
+        def view(request):
+            return response
+
+        middleware = InstrumentationMiddleware(view)
+        # Sampled logging is measured as configured, only the slow-request threshold is disabled.
+        middleware.slow = float("inf")
+        bare_us = self.timed(lambda: view(request), n)
+        instrumented_us = self.timed(lambda: middleware(request), n)
+
+        def execute(sql, params, many, context):
+            return None
+
+        token = _current.set(RequestStats())
+        try:
+            query_us = self.timed(lambda: db_wrapper(execute, "SELECT 1", (), False, {}), n)
+        finally:
+            _current.reset(token)
+        registry.clear()
+
+        self.stdout.write(json.dumps({
+            "requests": n,
+            "middleware_overhead_us": round(instrumented_us - bare_us, 2),
+            "per_query_overhead_us": round(query_us, 2),
+        }, indent=2))
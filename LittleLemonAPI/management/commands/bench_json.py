@@ -0,0 +1,64 @@
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from LittleLemonAPI import compact, renderers
+from LittleLemonAPI.benchmarks import isolated_database
+from LittleLemonAPI.models import MenuItem, Order
+from LittleLemonAPI.renderers import FastJSONParser, FastJSONRenderer
+from LittleLemonAPI.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks encoding and decoding a menu and an order listing payload with DRF's "
+        "JSONRenderer/JSONParser against FastJSONRenderer/FastJSONParser (renderers.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def best(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write("orjson is not installed, FastJSONRenderer falls back to the stdlib encoder.")
+        with isolated_database():
+            seeder = Seeder(seed=0, prefix="bench-")
+            seeder.menu_items(options["rows"], seeder.categories(20))
+            customer_ids = seeder.users(100)
+            seeder.orders(options["rows"], customer_ids, seeder.crew(5), max_items=1)
+            payloads = {
+                # What GET /api/menu-items and GET /api/orders put in the response, unpaginated.
+                "menu items": {"results": compact.menu_items(compact.menu_item_rows(MenuItem.objects.order_by("id")), customer_ids[0])},
+                "orders": {"results": list(Order.objects.order_by("id").values())},
+            }
+
+        results = []
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            result = {"payload": name, "rows": len(data["results"]), "bytes": len(body)}
+            result["identical"] = FastJSONRenderer().render(data) == body
+            for operation, stdlib, fast in [
+                ("encode", lambda: JSONRenderer().render(data), lambda: FastJSONRenderer().render(data)),
+                ("decode", lambda: JSONParser().parse(io.BytesIO(body)), lambda: FastJSONParser().parse(io.BytesIO(body))),
+            ]:
+                before = self.best(stdlib, options["repeat"])
+                after = self.best(fast, options["repeat"])
+                result[f"{operation}_stdlib_ms"] = round(before * 1000, 3)
+                result[f"{operation}_fast_ms"] = round(after * 1000, 3)
+                result[f"{operation}_speedup"] = round(before / after, 1)
+            results.append(result)
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,46 @@
+import json
+import time
+
+from django.contrib.auth.models import User, Group
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from LittleLemonAPI.benchmarks import isolated_database
+from LittleLemonAPI.models import Category, MenuItem
+
+
+class Command(BaseCommand):
+    help = "Benchmarks N menu items through POST /api/menu-items/bulk against N single POST /api/menu-items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+
+    def run(self, name, func):
+        MenuItem.objects.all().delete()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        return {"path": name, "items": MenuItem.objects.count(), "queries": len(captured), "total_ms": round(elapsed * 1000, 3)}
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            manager = User.objects.create(username="manager")
+            Group.objects.create(name="Manager").user_set.add(manager)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=manager).key)
+            categories = Category.objects.bulk_create([Category(slug=f"c{i}", title=f"Category {i}") for i in range(10)])
+            rows = [
+                {"title": f"Item {i}", "price": "7.25", "featured": i % 5 == 0, "category_id": categories[i % 10].id}
+                for i in range(options["items"])
+            ]
+
+            results = [
+                self.run("single POST", lambda: [client.post("/api/menu-items", row, format="json") for row in rows]),
+                self.run("bulk POST", lambda: client.post("/api/menu-items/bulk", rows, format="json")),
+            ]
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,83 @@
+import datetime
+import json
+import random
+
+from django.contrib.auth.models import User, Group
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from LittleLemonAPI.benchmarks import isolated_database, measure, summarize
+from LittleLemonAPI.models import Order
+from LittleLemonAPI.pagination import KeysetPagination
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the order listing (GET /api/orders) for each role against N synthetic orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=1_000_000)
+        parser.add_argument("--customers", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def seed(self, options):
+        rng = random.Random(0)
+        customers = User.objects.bulk_create([User(username=f"customer-{i}") for i in range(options["customers"])])
+        crew = User.objects.create(username="crew")
+        Group.objects.create(name="Delivery crew").user_set.add(crew)
+        manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(manager)
+
+        start = datetime.date(2020, 1, 1)
+        remaining = options["orders"]
+        with transaction.atomic():
+            while remaining:
+                size = min(remaining, options["batch_size"])
+                Order.objects.bulk_create([
+                    Order(
+                        user=rng.choice(customers),
+                        delivery_crew=crew if rng.random() < 0.3 else None,
+                        status=rng.random() < 0.5,
+                        total=rng.randint(5, 200),
+                        date=start + datetime.timedelta(days=rng.randint(0, 1500)),
+                    )
+                    for _ in range(size)
+                ], batch_size=options["batch_size"])
+                remaining -= size
+        return customers[0], crew, manager
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.stdout.write(f"seeding {options['orders']} orders...")
+            customer, crew, manager = self.seed(options)
+
+            # A cursor half way through the manager listing, to show deep pages cost the same.
+            middle = Order.objects.order_by("-date", "-id").values("date", "id")[options["orders"] // 2]
+            deep_cursor = KeysetPagination().encode_cursor(middle["date"], middle["id"])
+
+            scenarios = {
+                "manager first page": (manager, "/api/orders"),
+                "manager deep page": (manager, f"/api/orders?cursor={deep_cursor}"),
+                "manager status filter": (manager, "/api/orders?status=true&ordering=-total"),
+                "delivery crew first page": (crew, "/api/orders"),
+                "customer first page": (customer, "/api/orders"),
+            }
+            results = []
+            for name, (user, url) in scenarios.items():
+                client = self.client_for(user)
+                client.get(url)
+                latencies, queries = measure(lambda: client.get(url), options["repeat"])
+                results.append({"scenario": name, "queries": queries, **summarize(latencies)})
+
+            # Baseline: what the previous implementation did, materializing every order.
+            latencies, queries = measure(lambda: list(Order.objects.all().values()), 3)
+            results.append({"scenario": "baseline: all orders .values()", "queries": queries, **summarize(latencies)})
+
+        self.stdout.write(json.dumps(results, indent=2))
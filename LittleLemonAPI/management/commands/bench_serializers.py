@@ -0,0 +1,73 @@
+import json
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from LittleLemonAPI import compact
+from LittleLemonAPI.benchmarks import isolated_database
+from LittleLemonAPI.models import Cart, MenuItem
+from LittleLemonAPI.seeding import Seeder
+from LittleLemonAPI.serializers import CartSerializer, MenuItemSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmarks the list serializers: rows per second through MenuItemSerializer "
+        "and CartSerializer against the compact serializers (compact.py), "
+        "fetching included. Checks the rendered output is identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def best(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        with isolated_database():
+            seeder = Seeder(seed=0, prefix="bench-")
+            seeder.menu_items(rows, seeder.categories(20))
+            customer_id, = seeder.users(1)
+            customer = User.objects.get(pk=customer_id)
+            # One cart holding every menu item.
+            Cart.objects.bulk_create([
+                Cart(user=customer, menu_item_id=pk, quantity=1, unit_price=prices[1], price=prices[1])
+                for pk, prices in seeder.prices.items()
+            ])
+            context = {"request": SimpleNamespace(user=customer)}
+
+            cases = [
+                ("menu items", MenuItemSerializer, MenuItem.objects.select_related("category"),
+                 compact.menu_item_rows, compact.menu_items),
+                ("cart lines", CartSerializer, Cart.objects.select_related("menu_item__category").filter(user=customer),
+                 compact.cart_rows, compact.cart_lines),
+            ]
+            results = []
+            for name, serializer_class, queryset, rows_of, build in cases:
+                queryset = queryset.order_by("id")
+                drf = lambda: serializer_class(queryset.all(), many=True, context=context).data
+                fast = lambda: build(rows_of(queryset.all()), customer_id)
+                identical = JSONRenderer().render(drf()) == JSONRenderer().render(fast())
+                count = queryset.count()
+                before = self.best(drf, options["repeat"])
+                after = self.best(fast, options["repeat"])
+                results.append({
+                    "serializer": name,
+                    "rows": count,
+                    "identical": identical,
+                    "before_rows_per_s": round(count / before),
+                    "after_rows_per_s": round(count / after),
+                    "speedup": round(before / after, 1),
+                })
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI import idempotency
+
+
+class Command(BaseCommand):
+    help = "Deletes expired idempotency keys in batches (also done in the background by the API)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired(options["batch_size"])
+        self.stdout.write(f"{deleted} expired idempotency keys deleted.")
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI import analytics
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily sales rollups from the orders, one chunk of days per transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", type=date.fromisoformat)
+        parser.add_argument("--date-to", type=date.fromisoformat)
+        parser.add_argument("--chunk-days", type=int, default=31)
+
+    def handle(self, *args, **options):
+        orders = 0
+        for start, end, counted in analytics.rebuild(options["date_from"], options["date_to"], options["chunk_days"]):
+            orders += counted
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{start} .. {end}: {counted} orders")
+        self.stdout.write(f"Sales rollups rebuilt from {orders} orders.")
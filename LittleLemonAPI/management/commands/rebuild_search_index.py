@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from LittleLemonAPI import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the menu full-text search index from the MenuItem and Category tables."
+
+    def handle(self, *args, **options):
+        if search.search_index() is None:
+            self.stdout.write(f"No full-text search index for {connection.vendor}, ?search= uses LIKE.")
+            return
+        search.rebuild()
+        self.stdout.write("Search index rebuilt.")
@@ -0,0 +1,73 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from LittleLemonAPI.models import Category
+from LittleLemonAPI.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates synthetic categories, menu items, users, carts and orders with bulk inserts. "
+        "The same --seed gives the same data. Seeded users log in with --password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--menu-items", type=int, default=1000)
+        parser.add_argument("--customers", type=int, default=10_000)
+        parser.add_argument("--managers", type=int, default=2)
+        parser.add_argument("--crew", type=int, default=20)
+        parser.add_argument("--carts", type=int, default=1000, help="Number of customers given a cart.")
+        parser.add_argument("--max-cart-lines", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=100_000)
+        parser.add_argument("--max-items-per-order", type=int, default=5)
+        parser.add_argument("--date-from", type=date.fromisoformat, default=date(2021, 1, 1))
+        parser.add_argument("--date-to", type=date.fromisoformat, default=date(2024, 12, 31))
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="seed-", help="Prefix of the generated usernames and category slugs.")
+        parser.add_argument("--password", default="littlelemon")
+
+    def handle(self, *args, **options):
+        if options["orders"] and not options["customers"]:
+            raise CommandError("Orders need at least one customer.")
+        if options["menu_items"] and not options["categories"]:
+            raise CommandError("Menu items need at least one category.")
+        if (options["orders"] or options["carts"]) and not options["menu_items"]:
+            raise CommandError("Orders and carts need at least one menu item.")
+        if options["carts"] > options["customers"]:
+            raise CommandError("--carts cannot exceed --customers.")
+        # Usernames and category slugs are generated from the prefix alone, so a second run would collide.
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists() or Category.objects.filter(slug__startswith=prefix).exists():
+            raise CommandError(f"This database already holds data seeded with --prefix {prefix!r}; pass another --prefix.")
+
+        started = time.perf_counter()
+        last_report = [0.0]
+
+        def progress(label, done, total):
+            # At most one line per second, plus the final one of each step.
+            now = time.perf_counter()
+            if done == total or now - last_report[0] >= 1:
+                last_report[0] = now
+                self.stdout.write(f"[{now - started:7.1f}s] {label}: {done}/{total}")
+                self.stdout.flush()
+
+        seeder = Seeder(options["seed"], options["batch_size"], options["password"], options["prefix"], progress)
+        categories = seeder.categories(options["categories"])
+        seeder.menu_items(options["menu_items"], categories)
+        customer_ids = seeder.users(options["customers"])
+        seeder.managers(options["managers"])
+        crew_ids = seeder.crew(options["crew"])
+        seeder.carts(customer_ids[:options["carts"]], options["max_cart_lines"])
+        items = seeder.orders(
+            options["orders"], customer_ids, crew_ids, options["max_items_per_order"],
+            options["date_from"], options["date_to"],
+        )
+        seeder.finish()
+        self.stdout.write(
+            f"Seeded {options['orders']} orders with {items} order items in {time.perf_counter() - started:.1f}s."
+        )
@@ -0,0 +1,126 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from LittleLemonAPI.benchmarks import isolated_database
+from LittleLemonAPI.models import Category, MenuItem, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs N concurrent cart+checkout writers against an on-disk SQLite database and counts lock errors. "
+        "Writers run as threads of this process (they share the in-process writer lock of sqlite.py) "
+        "and as separate worker processes, each with its own connection, as under gunicorn/uwsgi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=200)
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument("--processes", type=int, default=8)
+
+    def write(self, tokens, menu_item_id, rounds, wait, errors):
+        try:
+            clients = []
+            for token in tokens:
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION="Token " + token)
+                clients.append(client)
+            wait()
+            for _ in range(rounds):
+                for client in clients:
+                    client.post("/api/cart/menu-items", {"menu_item_id": menu_item_id, "quantity": 1}, format="json")
+                    client.post("/api/orders", {"date": "2023-06-14"}, format="json")
+        except OperationalError as error:
+            errors.append(str(error))
+        finally:
+            connections.close_all()
+
+    def run_threads(self, tokens, menu_item_id, options):
+        errors = []
+        barrier = threading.Barrier(len(tokens))
+        threads = [
+            threading.Thread(target=self.write, args=([token], menu_item_id, options["rounds"], barrier.wait, errors))
+            for token in tokens
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def run_processes(self, tokens, menu_item_id, options):
+        # Forked workers inherit the settings and the test database name, never the open connection.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        count = max(1, min(options["processes"], len(tokens)))
+        barrier = context.Barrier(count)
+        queue = context.Queue()
+
+        def worker(share):
+            errors = []
+            self.write(share, menu_item_id, options["rounds"], barrier.wait, errors)
+            queue.put(errors)
+
+        processes = [context.Process(target=worker, args=(tokens[i::count],)) for i in range(count)]
+        for process in processes:
+            process.start()
+        errors = [error for _ in processes for error in queue.get()]
+        for process in processes:
+            process.join()
+        return errors
+
+    def run(self, production, mode, options):
+        settings.SQLITE_PRODUCTION = production
+        # The profile's own OPTIONS (BEGIN IMMEDIATE and the busy timeout), as set in settings.py.
+        connection.settings_dict["OPTIONS"] = dict(settings.SQLITE_OPTIONS) if production else {}
+        path = os.path.join(tempfile.mkdtemp(), "stress.sqlite3")
+        with isolated_database(test_name=path):
+            category = Category.objects.create(slug="mains", title="Mains")
+            menu_item = MenuItem.objects.create(title="Item", price="8.00", featured=False, category=category)
+            users = User.objects.bulk_create([User(username=f"writer-{i}") for i in range(options["writers"])])
+            tokens = Token.objects.bulk_create([Token(key=f"{i:040d}", user=user) for i, user in enumerate(users)])
+            tokens = [token.key for token in tokens]
+
+            start = time.perf_counter()
+            if mode == "processes":
+                errors = self.run_processes(tokens, menu_item.id, options)
+            else:
+                errors = self.run_threads(tokens, menu_item.id, options)
+            elapsed = time.perf_counter() - start
+
+            return {
+                "sqlite_production": production,
+                "mode": mode,
+                "workers": options["processes"] if mode == "processes" else options["writers"],
+                "writers": options["writers"],
+                "orders_expected": options["writers"] * options["rounds"],
+                "orders_written": Order.objects.count(),
+                "lock_errors": sum("locked" in error for error in errors),
+                "other_errors": sum("locked" not in error for error in errors),
+                "seconds": round(elapsed, 2),
+            }
+
+    def handle(self, *args, **options):
+        saved = settings.SQLITE_PRODUCTION, connection.settings_dict.get("OPTIONS", {})
+        try:
+            results = [
+                self.run(False, "threads", options),
+                self.run(True, "threads", options),
+                self.run(False, "processes", options),
+                self.run(True, "processes", options),
+            ]
+        finally:
+            settings.SQLITE_PRODUCTION, connection.settings_dict["OPTIONS"] = saved
+        self.stdout.write(json.dumps(results, indent=2))
+        if any(result["sqlite_production"] and result["lock_errors"] for result in results):
+            raise SystemExit(1)
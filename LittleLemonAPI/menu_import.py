@@ -0,0 +1,82 @@
+import csv
+import io
+
+from .cache import catalog_cache, menu_item_cache
+from .prices import price_index
+from .models import Category, MenuItem
+from .serializers import MenuItemImportSerializer
+from .sqlite import write_transaction
+from . import search
+
+
+IMPORT_FIELDS = ['title', 'price', 'featured', 'category_id']
+
+
+"""
+[[Bulk menu import]]
+
+Purpose:
+    - Validates a whole menu in one pass and writes it with a fixed number of queries:
+    one in_bulk for the categories, one in_bulk for the ids being updated,
+    one bulk_create for the new items and one bulk_update for the existing ones.
+    Rows with an id update that MenuItem, rows without one create a new MenuItem.
+    If any row is invalid nothing is written.
+"""
+def parse_csv(upload):
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig') if not isinstance(upload, str) else io.StringIO(upload)
+    rows = []
+    for row in csv.DictReader(text):
+        rows.append({name: value for name, value in row.items() if value not in ('', None)})
+    return rows
+
+
+def import_menu_items(rows):
+    results = []
+    valid = []
+    for index, row in enumerate(rows):
+        serializer = MenuItemImportSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+            results.append(None)
+        else:
+            results.append({"row": index, "status": "error", "errors": serializer.errors})
+
+    categories = Category.objects.in_bulk({data['category_id'] for _, data in valid})
+    existing = MenuItem.objects.in_bulk({data['id'] for _, data in valid if data.get('id') is not None})
+
+    to_create = []
+    to_update = []
+    for index, data in valid:
+        errors = {}
+        if data['category_id'] not in categories:
+            errors['category_id'] = ["Category not found."]
+        if data.get('id') is not None and data['id'] not in existing:
+            errors['id'] = ["Menu item not found."]
+        if errors:
+            results[index] = {"row": index, "status": "error", "errors": errors}
+            continue
+        if data.get('id') is None:
+            to_create.append((index, MenuItem(**{name: data[name] for name in IMPORT_FIELDS})))
+        else:
+            menu_item = existing[data['id']]
+            for name in IMPORT_FIELDS:
+                setattr(menu_item, name, data[name])
+            to_update.append((index, menu_item))
+
+    if any(result is not None for result in results):
+        return results, False
+
+    with write_transaction():
+        MenuItem.objects.bulk_create([menu_item for _, menu_item in to_create])
+        MenuItem.objects.bulk_update([menu_item for _, menu_item in to_update], IMPORT_FIELDS)
+        search.index_menu_items(*[menu_item.id for _, menu_item in to_create + to_update])
+    # Bulk writes do not send post_save, so the catalog is invalidated and reindexed here.
+    catalog_cache.bump()
+    menu_item_cache.invalidate(*[menu_item.id for _, menu_item in to_update])
+    price_index.clear()
+
+    for index, menu_item in to_create:
+        results[index] = {"row": index, "status": "created", "id": menu_item.id}
+    for index, menu_item in to_update:
+        results[index] = {"row": index, "status": "updated", "id": menu_item.id}
+    return results, True
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_cart_summaries(apps, schema_editor):
+    Cart = apps.get_model("LittleLemonAPI", "Cart")
+    CartSummary = apps.get_model("LittleLemonAPI", "CartSummary")
+    CartSummary.objects.bulk_create(
+        [
+            CartSummary(
+                user_id=row["user_id"],
+                line_count=row["line_count"],
+                item_count=row["item_count"],
+                subtotal=row["subtotal"],
+            )
+            for row in Cart.objects.values("user_id").annotate(
+                line_count=Count("id"),
+                item_count=Sum("quantity"),
+                subtotal=Sum("price"),
+            )
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0006_alter_order_date"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CartSummary",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("line_count", models.PositiveIntegerField(default=0)),
+                ("item_count", models.PositiveIntegerField(default=0)),
+                (
+                    "subtotal",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=6),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_cart_summaries, migrations.RunPython.noop),
+    ]
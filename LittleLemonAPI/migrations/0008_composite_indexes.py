@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0007_cartsummary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                fields=["user", "menu_item"], name="cart_user_menu_item_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="menuitem",
+            index=models.Index(
+                fields=["category", "featured", "price"],
+                name="menuitem_cat_feat_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="menuitem",
+            index=models.Index(
+                fields=["category", "title"], name="menuitem_cat_title_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["user", "date"], name="order_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["delivery_crew", "status", "date"],
+                name="order_crew_status_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["status", "date"], name="order_status_date_idx"),
+        ),
+    ]
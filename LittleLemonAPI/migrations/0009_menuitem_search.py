@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:40
+
+from django.db import migrations
+
+# The DDL and backfill are frozen here rather than imported from LittleLemonAPI.search,
+# so later changes to the search index module cannot change what this migration does.
+INSTALL = {
+    "sqlite": [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "LittleLemonAPI_menuitem_search" '
+        'USING fts5(title, category, tokenize="unicode61 remove_diacritics 2", prefix="2 3")',
+        'INSERT INTO "LittleLemonAPI_menuitem_search" (rowid, title, category) '
+        'SELECT m.id, m.title, c.title FROM "LittleLemonAPI_menuitem" m '
+        'INNER JOIN "LittleLemonAPI_category" c ON c.id = m.category_id',
+    ],
+    "postgresql": [
+        'CREATE TABLE IF NOT EXISTS "LittleLemonAPI_menuitem_search" ('
+        'menuitem_id integer PRIMARY KEY REFERENCES "LittleLemonAPI_menuitem" (id) ON DELETE CASCADE, '
+        "document tsvector NOT NULL)",
+        'CREATE INDEX IF NOT EXISTS "LittleLemonAPI_menuitem_search_document" '
+        'ON "LittleLemonAPI_menuitem_search" USING GIN (document)',
+        'INSERT INTO "LittleLemonAPI_menuitem_search" (menuitem_id, document) '
+        "SELECT m.id, setweight(to_tsvector('simple', m.title), 'A') || setweight(to_tsvector('simple', c.title), 'B') "
+        'FROM "LittleLemonAPI_menuitem" m INNER JOIN "LittleLemonAPI_category" c ON c.id = m.category_id',
+    ],
+}
+
+UNINSTALL = 'DROP TABLE IF EXISTS "LittleLemonAPI_menuitem_search"'
+
+
+def install_search_index(apps, schema_editor):
+    statements = INSTALL.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def uninstall_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in INSTALL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0008_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
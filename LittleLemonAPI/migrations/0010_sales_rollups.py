@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    Order = apps.get_model("LittleLemonAPI", "Order")
+    OrderItem = apps.get_model("LittleLemonAPI", "OrderItem")
+    DailySales = apps.get_model("LittleLemonAPI", "DailySales")
+    DailyMenuItemSales = apps.get_model("LittleLemonAPI", "DailyMenuItemSales")
+    days = {
+        row["date"]: DailySales(
+            date=row["date"], order_count=row["order_count"], revenue=row["revenue"]
+        )
+        for row in Order.objects.values("date")
+        .annotate(order_count=Count("id"), revenue=Sum("total"))
+        .order_by()
+    }
+    lines = []
+    for row in (
+        OrderItem.objects.values("order__date", "menu_item_id")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("price"))
+        .order_by()
+    ):
+        days[row["order__date"]].item_count += row["quantity"]
+        lines.append(
+            DailyMenuItemSales(
+                date=row["order__date"],
+                menu_item_id=row["menu_item_id"],
+                quantity=row["quantity"],
+                revenue=row["revenue"],
+            )
+        )
+    DailySales.objects.bulk_create(days.values())
+    DailyMenuItemSales.objects.bulk_create(lines)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0009_menuitem_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                ("date", models.DateField(primary_key=True, serialize=False)),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("item_count", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyMenuItemSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "menu_item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="LittleLemonAPI.menuitem",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("date", "menu_item")},
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
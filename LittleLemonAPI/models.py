@@ -16,10 +16,16 @@ class MenuItem(models.Model):
     title = models.CharField(max_length=255, db_index=True)
     price = models.DecimalField(max_digits=6, decimal_places=2, db_index=True)
     featured = models.BooleanField(db_index=True)
-    category = models.ForeignKey(Category, on_delete=models.PROTECT)
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, db_index=False)
 
     def __str__(self) -> str:
         return f"[[MenuItem]] title: {self.title}. price: {self.price}. featured: {self.featured}. category: {self.category}."
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'featured', 'price'], name='menuitem_cat_feat_price_idx'),
+            models.Index(fields=['category', 'title'], name='menuitem_cat_title_idx'),
+        ]
     
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -33,11 +39,15 @@ class Cart(models.Model):
     
     class Meta:
         unique_together = ('menu_item', 'user')
+        # The user FK keeps its own index: as (user_id, rowid) it serves the cart listing's ORDER BY id.
+        indexes = [
+            models.Index(fields=['user', 'menu_item'], name='cart_user_menu_item_idx'),
+        ]
 
 
 class Order(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True, db_index=False)
     status = models.BooleanField(db_index=True, default=0)
     total = models.DecimalField(max_digits=6, decimal_places=2)
     date = models.DateField(db_index=True)
@@ -45,6 +55,14 @@ class Order(models.Model):
     def __str__(self) -> str:
         return f"[[Order]] status: {self.status}. date: {self.date}."
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='order_user_date_idx'),
+            models.Index(fields=['delivery_crew', 'status', 'date'], name='order_crew_status_date_idx'),
+            # status keeps its own index too: as (status, rowid) it serves ?ordering=status with the id tie-break.
+            models.Index(fields=['status', 'date'], name='order_status_date_idx'),
+        ]
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
@@ -56,4 +74,48 @@ class OrderItem(models.Model):
         return f"[[OrderItem]] quantity: {self.quantity}. unit_price: {self.unit_price}."
     
     class Meta:
-        unique_together = ('order', 'menu_item')
\ No newline at end of file
+        unique_together = ('order', 'menu_item')
+
+class CartSummary(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    line_count = models.PositiveIntegerField(default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+
+    def __str__(self) -> str:
+        return f"[[CartSummary]] line_count: {self.line_count}. item_count: {self.item_count}. subtotal: {self.subtotal}."
+
+class DailySales(models.Model):
+    date = models.DateField(primary_key=True)
+    order_count = models.PositiveIntegerField(default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self) -> str:
+        return f"[[DailySales]] date: {self.date}. order_count: {self.order_count}. revenue: {self.revenue}."
+
+class DailyMenuItemSales(models.Model):
+    date = models.DateField()
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self) -> str:
+        return f"[[DailyMenuItemSales]] date: {self.date}. quantity: {self.quantity}. revenue: {self.revenue}."
+
+    class Meta:
+        unique_together = ('date', 'menu_item')
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=32)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.TextField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"[[IdempotencyKey]] key: {self.key}. status_code: {self.status_code}. expires_at: {self.expires_at}."
+
+    class Meta:
+        unique_together = ('user', 'key')
@@ -0,0 +1,115 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+"""
+[[Keyset pagination]]
+
+Purpose:
+    - Cursor pagination on (ordering field, id). Each page is a single indexed
+    range scan: WHERE (field, id) < (last field, last id) ORDER BY field, id LIMIT n,
+    so the cost of page 1000 is the same as the cost of page 1.
+    The ordering field comes from ?ordering= and must be one of the view's
+    ordering_fields (default_ordering otherwise). The cursor is opaque to clients.
+"""
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    default_ordering = '-date'
+
+    def get_ordering(self, request, view):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        allowed = list(getattr(view, 'ordering_fields', [])) + [self.default_ordering.lstrip('-')]
+        if ordering.lstrip('-') not in allowed:
+            ordering = self.default_ordering
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except ValueError:
+            raise NotFound("Invalid cursor.")
+        # Well-formed JSON is not enough: it must be the [value, id] pair encode_cursor() wrote.
+        if not isinstance(cursor, list) or len(cursor) != 2:
+            raise NotFound("Invalid cursor.")
+        value, pk = cursor
+        if not isinstance(value, (str, int, float)) or type(pk) is not int:
+            raise NotFound("Invalid cursor.")
+        return value, pk
+
+    def encode_cursor(self, value, pk):
+        return base64.urlsafe_b64encode(json.dumps([value, pk], default=str).encode()).decode()
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        The sliced queryset of the requested page, with one extra row to tell whether
+        there is a next page. Callers evaluate it (sync or async) and pass the rows to set_page().
+        """
+        self.request = request
+        self.field, descending = self.get_ordering(request, view)
+        self.current_page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            try:
+                value = queryset.model._meta.get_field(self.field).to_python(value)
+            except ValidationError:
+                raise NotFound("Invalid cursor.")
+            lookup = 'lt' if descending else 'gt'
+            # The redundant outer bound lets the database seek the index instead of scanning it.
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}e': value}),
+                Q(**{f'{self.field}__{lookup}': value}) | Q(**{f'id__{lookup}': pk}),
+            )
+
+        prefix = '-' if descending else ''
+        return queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')[:self.current_page_size + 1]
+
+    def set_page(self, rows):
+        self.next_cursor = None
+        if len(rows) > self.current_page_size:
+            rows = rows[:self.current_page_size]
+            last = rows[-1]
+            if isinstance(last, dict):
+                self.next_cursor = self.encode_cursor(last[self.field], last['id'])
+            else:
+                self.next_cursor = self.encode_cursor(getattr(last, self.field), last.id)
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "message":"200 - OK.",
+            "next": self.get_next_link(),
+            "data": data,
+        })
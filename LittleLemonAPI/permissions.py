@@ -0,0 +1,25 @@
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+from .roles import is_manager, is_delivery_crew
+
+
+class IsManager(BasePermission):
+    message = "403 - Unauthorized."
+
+    def has_permission(self, request, view):
+        return is_manager(request.user)
+
+
+class IsDeliveryCrew(BasePermission):
+    message = "403 - Unauthorized."
+
+    def has_permission(self, request, view):
+        return is_delivery_crew(request.user)
+
+
+class IsMetricsScraper(BasePermission):
+    message = "403 - Unauthorized."
+
+    def has_permission(self, request, view):
+        return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
@@ -0,0 +1,80 @@
+from collections import namedtuple
+from threading import Lock
+
+from .cache import catalog_cache
+from .models import MenuItem
+
+
+PriceEntry = namedtuple('PriceEntry', ['price', 'featured', 'category_id'])
+
+
+"""
+[[Price index]]
+
+Purpose:
+    - In-process index of every MenuItem id -> (price, featured, category_id), so
+    adding to the cart validates and prices its lines without fetching
+    MenuItem rows. A menu item missing from the index is not available.
+
+    - The index is loaded with one query on first use and reloaded whenever the
+    catalog version (cache.py, bumped on every MenuItem/Category write) moves.
+    As with the rendered item cache, a load is only kept if the version did not
+    move while it ran. Writes in this process also clear it once they commit
+    (signals.py), so a reload that ran between the bump and the commit is not kept.
+
+    - An id that is not in the index is looked up in the database before it is
+    reported missing: the item may be newer than the index. Found items are added
+    to a copy of the index, which replaces it under the lock.
+"""
+class PriceIndex:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.lock = Lock()
+        self.items = {}
+        self.version = None
+
+    def load(self):
+        return {
+            pk: PriceEntry(price, featured, category_id)
+            for pk, price, featured, category_id in MenuItem.objects.values_list('id', 'price', 'featured', 'category_id')
+        }
+
+    def snapshot(self):
+        version = self.catalog.version()
+        if self.version == version:
+            return self.items
+        items = self.load()
+        with self.lock:
+            if self.catalog.version() == version:
+                self.items, self.version = items, version
+        return items
+
+    def get_many(self, pks):
+        """
+        Returns {pk: PriceEntry} for the ids among pks that exist.
+        """
+        items = self.snapshot()
+        found = {pk: items[pk] for pk in pks if pk in items}
+        missing = [pk for pk in pks if pk not in items]
+        if missing:
+            fetched = {
+                pk: PriceEntry(price, featured, category_id)
+                for pk, price, featured, category_id in MenuItem.objects.filter(pk__in=missing).values_list('id', 'price', 'featured', 'category_id')
+            }
+            found.update(fetched)
+            if fetched:
+                # Copy on write: snapshots handed out to other threads are never mutated.
+                with self.lock:
+                    if self.items is items:
+                        self.items = {**items, **fetched}
+        return found
+
+    def get(self, pk):
+        return self.get_many([pk]).get(pk)
+
+    def clear(self):
+        with self.lock:
+            self.items, self.version = {}, None
+
+
+price_index = PriceIndex(catalog_cache)
@@ -0,0 +1,193 @@
+import logging
+import os
+import random
+import re
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import instrumentation
+
+
+logger = logging.getLogger(__name__)
+
+
+class RepeatedQueryError(AssertionError):
+    pass
+
+
+"""
+[[Query profiler]]
+
+Purpose:
+    - Watches the queries of a request through an execute wrapper on every
+    connection. Each query is reduced to a fingerprint (literals and IN lists
+    collapsed), so the same query issued once per row shows up as one
+    fingerprint with a growing count.
+
+    - When a fingerprint reaches REPEAT_THRESHOLD within one request, the call site
+    (the innermost frame of this project) is recorded. With RAISE on, a
+    RepeatedQueryError is raised right there, which is what the tests use.
+    Otherwise the repeats and any query slower than SLOW_QUERY_MS are logged
+    as warnings at the end of the request.
+
+    - QueryProfilerMiddleware profiles a SAMPLE_RATE share of requests.
+    profile_queries() profiles a block of code directly, e.g. in the shell.
+
+Settings:
+    QUERY_PROFILER = {
+        "SAMPLE_RATE": 0.01,
+        "REPEAT_THRESHOLD": 5,
+        "SLOW_QUERY_MS": 100,
+        "RAISE": False,
+    }
+"""
+def _config():
+    return getattr(settings, 'QUERY_PROFILER', {})
+
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_in_lists = re.compile(r'\bIN \((?:\?|%s)(?:, (?:\?|%s))*\)')
+_spaces = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    sql = _literals.sub('?', sql)
+    sql = _in_lists.sub('IN (...)', sql)
+    return _spaces.sub(' ', sql).strip()
+
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+# Frames of the execute wrappers themselves are never the call site.
+_wrapper_files = {__file__, instrumentation.__file__}
+
+
+def call_site():
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_project_root) and filename not in _wrapper_files and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, _project_root)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryProfile:
+    def __init__(self, repeat_threshold=5, slow_query_ms=100, raise_errors=False):
+        self.repeat_threshold = repeat_threshold
+        self.slow = slow_query_ms / 1000
+        self.raise_errors = raise_errors
+        self.counts = {}
+        self.repeats = {}
+        self.slow_queries = []
+
+    def record(self, sql, duration):
+        key = fingerprint(sql)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if duration >= self.slow:
+            self.slow_queries.append((key, duration, call_site()))
+        if count == self.repeat_threshold:
+            site = call_site()
+            self.repeats[key] = site
+            if self.raise_errors:
+                raise RepeatedQueryError(f"Query repeated {count} times in one request at {site}: {key}")
+
+    def report(self, label):
+        for key, site in self.repeats.items():
+            logger.warning(
+                'repeated query route=%s count=%d site=%s sql=%s', label, self.counts[key], site, key,
+                extra={'query_profile': {'kind': 'repeat', 'route': label, 'count': self.counts[key], 'site': site, 'sql': key}},
+            )
+        for key, duration, site in self.slow_queries:
+            logger.warning(
+                'slow query route=%s duration_ms=%.2f site=%s sql=%s', label, duration * 1000, site, key,
+                extra={'query_profile': {'kind': 'slow', 'route': label, 'duration_ms': round(duration * 1000, 3), 'site': site, 'sql': key}},
+            )
+
+
+_current = ContextVar('littlelemon_query_profile', default=None)
+
+
+def profile_wrapper(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    result = execute(sql, params, many, context)
+    profile.record(sql, perf_counter() - start)
+    return result
+
+
+@receiver(connection_created)
+def install_profile_wrapper(sender, connection, **kwargs):
+    if profile_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_wrapper)
+
+
+def new_profile(**overrides):
+    config = {**_config(), **overrides}
+    return QueryProfile(
+        repeat_threshold=config.get('REPEAT_THRESHOLD', 5),
+        slow_query_ms=config.get('SLOW_QUERY_MS', 100),
+        raise_errors=config.get('RAISE', False),
+    )
+
+
+@contextmanager
+def profile_queries(**overrides):
+    """
+    Profiles the queries run inside the block. Keyword arguments override the
+    QUERY_PROFILER setting, e.g. profile_queries(RAISE=True, REPEAT_THRESHOLD=3).
+    """
+    profile = new_profile(**overrides)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+class QueryProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = _config().get('SAMPLE_RATE', 0.01)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with profile_queries() as profile:
+            response = self.get_response(request)
+        self.finish(request, profile)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with profile_queries() as profile:
+            response = await self.get_response(request)
+        self.finish(request, profile)
+        return response
+
+    def finish(self, request, profile):
+        match = request.resolver_match
+        profile.report(match.view_name if match is not None and match.url_name else request.path)
@@ -0,0 +1,90 @@
+import io
+
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+"""
+[[Fast JSON renderer and parser]]
+
+Purpose:
+    - Drop-in replacements for DRF's JSONRenderer and JSONParser that encode and
+    decode with orjson when it is installed (`pip install orjson`) and fall back
+    to DRF's stdlib json implementation otherwise. Selected in settings.py:
+
+        REST_FRAMEWORK = {
+            "DEFAULT_RENDERER_CLASSES": [
+                "LittleLemonAPI.renderers.FastJSONRenderer",
+                "rest_framework.renderers.BrowsableAPIRenderer",
+            ],
+            "DEFAULT_PARSER_CLASSES": [
+                "LittleLemonAPI.renderers.FastJSONParser",
+                "rest_framework.parsers.FormParser",
+                "rest_framework.parsers.MultiPartParser",
+            ],
+        }
+
+    - The output is the same bytes as JSONRenderer with DRF's default JSON settings
+    (COMPACT_JSON, UNICODE_JSON): dates, times and strings are encoded by orjson
+    itself, Decimal and everything else orjson does not know go through DRF's
+    JSONEncoder.default, and U+2028/U+2029 are escaped the same way.
+    tests.FastJSONTest holds the two side by side.
+
+    Known differences: floats in exponent form ("1e16", not "1e+16"), UTC offsets
+    with seconds (cut to minutes), and NaN/Infinity which become null instead of
+    failing under STRICT_JSON.
+
+    - Anything orjson cannot produce identically is rendered by JSONRenderer:
+    indents other than 2 (the browsable API uses 4), non-compact or ASCII-only
+    output, and integers beyond 64 bits. Likewise the parser hands non-UTF-8
+    bodies and bodies orjson rejects to JSONParser, so error messages are unchanged.
+"""
+def json_renderer():
+    """
+    The configured JSON renderer, for code that renders outside a DRF response.
+    """
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if issubclass(renderer_class, JSONRenderer):
+            return renderer_class()
+    return JSONRenderer()
+
+
+class FastJSONRenderer(JSONRenderer):
+    default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        if orjson is None or get_encoding(parser_context).lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+MANAGER = 'Manager'
+DELIVERY_CREW = 'Delivery crew'
+
+
+"""
+[[Role resolver]]
+
+Purpose:
+    - Resolves the group names of a user once per request (memoized on the user
+    object attached to the request) and caches them across requests in the
+    Django cache for ROLE_CACHE_TTL seconds.
+    Group membership changes call invalidate_roles() through the m2m_changed signal.
+"""
+def _cache_key(user_id):
+    return f"roles:{user_id}"
+
+
+def get_roles(user):
+    if user is None or user.pk is None:
+        return frozenset()
+    roles = getattr(user, '_littlelemon_roles', None)
+    if roles is None:
+        roles = cache.get(_cache_key(user.pk))
+        if roles is None:
+            roles = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(_cache_key(user.pk), roles, getattr(settings, 'ROLE_CACHE_TTL', 60))
+        user._littlelemon_roles = roles
+    return roles
+
+
+async def aget_roles(user):
+    if user is None or user.pk is None:
+        return frozenset()
+    roles = getattr(user, '_littlelemon_roles', None)
+    if roles is None:
+        roles = await cache.aget(_cache_key(user.pk))
+        if roles is None:
+            roles = frozenset([name async for name in user.groups.values_list('name', flat=True)])
+            await cache.aset(_cache_key(user.pk), roles, getattr(settings, 'ROLE_CACHE_TTL', 60))
+        user._littlelemon_roles = roles
+    return roles
+
+
+def invalidate_roles(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def is_manager(user):
+    return MANAGER in get_roles(user)
+
+
+def is_delivery_crew(user):
+    return DELIVERY_CREW in get_roles(user)
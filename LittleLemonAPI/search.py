@@ -0,0 +1,181 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import Category, MenuItem
+from .sqlite import write_transaction
+
+
+SEARCH_TABLE = 'LittleLemonAPI_menuitem_search'
+
+
+"""
+[[Menu search index]]
+
+Purpose:
+    - Full-text index over the menu item title and its category title, used by
+    ?search= on /api/menu-items instead of LIKE '%term%' across the category join.
+    Every word of the query is a prefix match ("chick sal" finds "Chicken Salad")
+    and results are ranked, title matches first.
+
+    - SQLite keeps the index in an FTS5 table, PostgreSQL in a table of weighted
+    tsvectors with a GIN index. Both expose the same methods:
+    install/uninstall, index (rebuild rows), remove and filter (queryset search).
+    filter() is expressions only: the matching ids as a RawSQL subquery and the
+    rank as a correlated RawSQL annotation, so it composes with any queryset.
+    Other databases fall back to DRF's SearchFilter.
+
+    - The index is kept in sync from signals.py (MenuItem and Category saves/deletes)
+    and menu_import.py (bulk writes skip signals). `manage.py rebuild_search_index`
+    rebuilds it from scratch.
+"""
+class SearchIndex:
+    table = SEARCH_TABLE
+
+    def tokens(self, term):
+        return re.findall(r'\w+', term.lower())
+
+    def where(self, ids=None, category_id=None):
+        if ids is not None:
+            return f'm.id IN ({", ".join(["%s"] * len(ids))})', list(ids)
+        if category_id is not None:
+            return 'm.category_id = %s', [category_id]
+        return '1 = 1', []
+
+    def index(self, cursor, ids=None, category_id=None):
+        if ids is not None and not ids:
+            return
+        where, params = self.where(ids, category_id)
+        cursor.execute(
+            f'DELETE FROM "{self.table}" WHERE {self.key} IN (SELECT m.id FROM "{MenuItem._meta.db_table}" m WHERE {where})',
+            params,
+        )
+        cursor.execute(
+            f'INSERT INTO "{self.table}" ({self.key}, {", ".join(self.columns)}) '
+            f'SELECT m.id, {self.document} FROM "{MenuItem._meta.db_table}" m '
+            f'INNER JOIN "{Category._meta.db_table}" c ON c.id = m.category_id WHERE {where}',
+            params,
+        )
+
+    def filter(self, queryset, tokens):
+        """
+        The menu items matching every token, annotated with search_rank (lower is better).
+        """
+        query = self.query(tokens)
+        return queryset.filter(pk__in=RawSQL(self.matches(), [query])).annotate(
+            search_rank=RawSQL(self.rank(), [query], output_field=FloatField()),
+        )
+
+    def remove(self, cursor, ids):
+        if ids:
+            cursor.execute(f'DELETE FROM "{self.table}" WHERE {self.key} IN ({", ".join(["%s"] * len(ids))})', list(ids))
+
+
+class SQLiteSearchIndex(SearchIndex):
+    key = 'rowid'
+    columns = ['title', 'category']
+    document = 'm.title, c.title'
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{self.table}" '
+            f'USING fts5(title, category, tokenize="unicode61 remove_diacritics 2", prefix="2 3")'
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+
+    def query(self, tokens):
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def matches(self):
+        return f'SELECT rowid FROM "{self.table}" WHERE "{self.table}" MATCH %s'
+
+    def rank(self):
+        # bm25() is lower for better matches, a title hit weighs twice a category hit.
+        return (
+            f'SELECT bm25("{self.table}", 2.0, 1.0) FROM "{self.table}" '
+            f'WHERE "{self.table}" MATCH %s AND rowid = "{MenuItem._meta.db_table}"."id"'
+        )
+
+
+class PostgresSearchIndex(SearchIndex):
+    key = 'menuitem_id'
+    columns = ['document']
+    document = "setweight(to_tsvector('simple', m.title), 'A') || setweight(to_tsvector('simple', c.title), 'B')"
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self.table}" ('
+            f'menuitem_id integer PRIMARY KEY REFERENCES "{MenuItem._meta.db_table}" (id) ON DELETE CASCADE, '
+            f'document tsvector NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS "{self.table}_document" ON "{self.table}" USING GIN (document)')
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+
+    def query(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def matches(self):
+        return f'SELECT menuitem_id FROM "{self.table}" WHERE document @@ to_tsquery(\'simple\', %s)'
+
+    def rank(self):
+        # Negated so that, as with SQLite, a lower search_rank is a better match.
+        return (
+            f'SELECT -ts_rank(document, to_tsquery(\'simple\', %s)) FROM "{self.table}" '
+            f'WHERE menuitem_id = "{MenuItem._meta.db_table}"."id"'
+        )
+
+
+def search_index(using=connection):
+    return {'sqlite': SQLiteSearchIndex, 'postgresql': PostgresSearchIndex}.get(using.vendor, lambda: None)()
+
+
+def index_menu_items(*ids):
+    index = search_index()
+    if index is not None:
+        with connection.cursor() as cursor:
+            index.index(cursor, ids=ids)
+
+
+def index_category(category_id):
+    index = search_index()
+    if index is not None:
+        with connection.cursor() as cursor:
+            index.index(cursor, category_id=category_id)
+
+
+def remove_menu_items(*ids):
+    index = search_index()
+    if index is not None:
+        with connection.cursor() as cursor:
+            index.remove(cursor, ids)
+
+
+def rebuild():
+    index = search_index()
+    if index is not None:
+        with write_transaction(), connection.cursor() as cursor:
+            index.uninstall(cursor)
+            index.install(cursor)
+            index.index(cursor)
+
+
+class FullTextSearchFilter(SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        index = search_index()
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+        tokens = index.tokens(request.query_params.get(self.search_param, ''))
+        if not tokens:
+            return queryset
+        queryset = index.filter(queryset, tokens)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('search_rank', 'id')
+        return queryset
@@ -0,0 +1,196 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import analytics, search
+from .models import Category, MenuItem, Cart, CartSummary, Order, OrderItem
+from .roles import DELIVERY_CREW, MANAGER
+
+
+"""
+[[Synthetic data]]
+
+Purpose:
+    - Generates categories, menu items, users, carts and orders with their items
+    at any scale for benchmarks and capacity planning (`manage.py seed`, bench_api).
+    The same seed on the same database always produces the same data.
+
+    - Categories and menu items go through bulk_create. The large tables (users,
+    carts, orders, order items) are written as plain tuples with executemany,
+    one transaction per batch: building a model instance per row costs more
+    than the insert itself. Their ids are assigned here, so order items are
+    built without reading the orders back, and users share one password hash
+    computed up front. A cart or an order never holds the same menu item twice
+    (unique_together).
+
+    - finish() brings the derived tables up to date, as these writes skip the
+    signals that maintain them: sales rollups for the seeded dates and the
+    menu search index.
+"""
+ADJECTIVES = ['Grilled', 'Baked', 'Fried', 'Fresh', 'Spicy', 'Smoked', 'Roasted', 'Braised']
+NOUNS = ['Chicken', 'Salmon', 'Tofu', 'Lamb', 'Veggie', 'Bruschetta', 'Risotto', 'Salad']
+
+
+def insert(model, fields, rows):
+    """
+    Inserts rows (tuples of DB-ready values, in the order of fields) into model's table.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def reset_sequences(*models):
+    # Rows inserted with explicit ids leave PostgreSQL sequences behind, SQLite needs nothing.
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+class Seeder:
+    def __init__(self, seed=0, batch_size=10_000, password='littlelemon', prefix='seed-', progress=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.progress = progress or (lambda label, done, total: None)
+        self.password = make_password(password)
+        # menu item id -> price of 0, 1, 2 and 3 of it.
+        self.prices = {}
+        self.dates = None
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def categories(self, count):
+        categories = Category.objects.bulk_create([
+            Category(slug=f'{self.prefix}category-{i}', title=f'Category {i}') for i in range(count)
+        ], batch_size=self.batch_size)
+        self.progress('categories', count, count)
+        return categories
+
+    def menu_items(self, count, categories):
+        created = []
+        for start, end in self.batches(count):
+            with transaction.atomic():
+                created += MenuItem.objects.bulk_create([
+                    MenuItem(
+                        title=f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)} {i}',
+                        price=Decimal(self.rng.randint(300, 3000)) / 100,
+                        featured=self.rng.random() < 0.1,
+                        category=self.rng.choice(categories),
+                    )
+                    for i in range(start, end)
+                ], batch_size=self.batch_size)
+            self.progress('menu items', end, count)
+        self.prices.update((menu_item.pk, [menu_item.price * quantity for quantity in range(4)]) for menu_item in created)
+        return created
+
+    def users(self, count, role='customer', group=None):
+        first_id = next_id(User)
+        joined = connection.ops.adapt_datetimefield_value(timezone.now())
+        for start, end in self.batches(count):
+            with transaction.atomic():
+                insert(User, [
+                    'id', 'username', 'password', 'is_superuser', 'is_staff', 'is_active',
+                    'first_name', 'last_name', 'email', 'date_joined',
+                ], [
+                    (first_id + i, f'{self.prefix}{role}-{i}', self.password, False, False, True, '', '', '', joined)
+                    for i in range(start, end)
+                ])
+            self.progress(f'{role} users', end, count)
+        reset_sequences(User)
+        ids = list(range(first_id, first_id + count))
+        if group is not None:
+            Group.objects.get_or_create(name=group)[0].user_set.add(*ids)
+        return ids
+
+    def managers(self, count):
+        return self.users(count, 'manager', MANAGER)
+
+    def crew(self, count):
+        return self.users(count, 'crew', DELIVERY_CREW)
+
+    def lines(self, menu_item_ids, max_lines):
+        # Distinct menu items, as carts and orders are unique per menu item.
+        chosen = self.rng.sample(menu_item_ids, min(self.rng.randint(1, max_lines), len(menu_item_ids)))
+        return [(menu_item_id, self.rng.randint(1, 3)) for menu_item_id in chosen]
+
+    def carts(self, user_ids, max_lines=5):
+        menu_item_ids = list(self.prices)
+        for start, end in self.batches(len(user_ids)):
+            carts, summaries = [], []
+            for user_id in user_ids[start:end]:
+                lines = self.lines(menu_item_ids, max_lines)
+                subtotal = Decimal('0.00')
+                for menu_item_id, quantity in lines:
+                    prices = self.prices[menu_item_id]
+                    carts.append((user_id, menu_item_id, quantity, prices[1], prices[quantity]))
+                    subtotal += prices[quantity]
+                summaries.append((user_id, len(lines), sum(quantity for _, quantity in lines), subtotal))
+            with transaction.atomic():
+                insert(Cart, ['user', 'menu_item', 'quantity', 'unit_price', 'price'], carts)
+                insert(CartSummary, ['user', 'line_count', 'item_count', 'subtotal'], summaries)
+            self.progress('carts', end, len(user_ids))
+
+    def orders(self, count, customer_ids, crew_ids=(), max_items=5,
+               date_from=datetime.date(2021, 1, 1), date_to=datetime.date(2024, 12, 31)):
+        """
+        Creates count orders with 1..max_items items each, returns the number of items.
+        """
+        menu_item_ids = list(self.prices)
+        dates = [
+            connection.ops.adapt_datefield_value(date_from + datetime.timedelta(days=day))
+            for day in range((date_to - date_from).days + 1)
+        ]
+        first_id = next_id(Order)
+        items = 0
+        for start, end in self.batches(count):
+            orders, order_items = [], []
+            for order_id in range(first_id + start, first_id + end):
+                total = Decimal('0.00')
+                for menu_item_id, quantity in self.lines(menu_item_ids, max_items):
+                    prices = self.prices[menu_item_id]
+                    order_items.append((order_id, menu_item_id, quantity, prices[1], prices[quantity]))
+                    total += prices[quantity]
+                orders.append((
+                    order_id,
+                    self.rng.choice(customer_ids),
+                    self.rng.choice(crew_ids) if crew_ids and self.rng.random() < 0.7 else None,
+                    self.rng.random() < 0.6,
+                    total,
+                    self.rng.choice(dates),
+                ))
+            with transaction.atomic():
+                insert(Order, ['id', 'user', 'delivery_crew', 'status', 'total', 'date'], orders)
+                insert(OrderItem, ['order', 'menu_item', 'quantity', 'unit_price', 'price'], order_items)
+            items += len(order_items)
+            self.progress('orders', end, count)
+        reset_sequences(Order)
+        if count:
+            self.dates = (min(date_from, self.dates[0]), max(date_to, self.dates[1])) if self.dates else (date_from, date_to)
+        return items
+
+    def finish(self):
+        if self.dates is not None:
+            days = (self.dates[1] - self.dates[0]).days + 1
+            for start, end, _ in analytics.rebuild(*self.dates):
+                self.progress('sales rollups', (end - self.dates[0]).days + 1, days)
+        if self.prices:
+            search.rebuild()
+            self.progress('search index', 1, 1)
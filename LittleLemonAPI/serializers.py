@@ -149,3 +149,32 @@ class OrderItemSerializer(serializers.ModelSerializer):
                 "min_value" : 0,
             },
         }
+
+
+class MenuItemImportSerializer(serializers.Serializer):
+    """
+    One row of a bulk menu import. Validation runs without queries,
+    the category and the id (for updates) are checked in bulk by menu_import.
+    """
+    id = serializers.IntegerField(required=False, allow_null=True)
+    title = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    featured = serializers.BooleanField()
+    category_id = serializers.IntegerField()
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """
+    One operation of a batch cart update. Validation runs without queries,
+    the menu items are checked in bulk by cart_batch against the price index.
+    """
+    op = serializers.ChoiceField(choices=['set', 'increment', 'remove'], default='set')
+    menu_item_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(required=False, min_value=-32767, max_value=32767)
+
+    def validate(self, data):
+        if data['op'] == 'set' and data.get('quantity', -1) < 0:
+            raise serializers.ValidationError({"quantity": ["A quantity of 0 or more is required."]})
+        if data['op'] == 'increment' and not data.get('quantity'):
+            raise serializers.ValidationError({"quantity": ["A non-zero quantity is required."]})
+        return data
@@ -0,0 +1,183 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Category, MenuItem, Cart, Order
+from .cache import catalog_cache, menu_item_cache
+from . import analytics, cart_summary, search
+from .dispatch import load_table
+from .prices import price_index
+from .roles import invalidate_roles
+from .authentication import token_cache
+from rest_framework.authtoken.models import Token
+
+
+"""
+[[Catalog invalidation]]
+
+Purpose:
+    - Bumps the catalog version on every MenuItem/Category write, wherever it comes from
+    (the API views, the admin or the shell). The rendered item bytes it affects and
+    the price index are dropped once the write commits.
+
+    - The version is bumped again once the write commits. Until then other
+    connections still read the old rows, and a page they build under the first
+    bump would otherwise stay cached under the current version after the commit.
+"""
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_version(sender, instance, **kwargs):
+    catalog_cache.bump()
+    transaction.on_commit(catalog_cache.bump)
+    if sender is MenuItem:
+        pk = instance.pk
+        transaction.on_commit(lambda: menu_item_cache.invalidate(pk))
+        transaction.on_commit(price_index.clear)
+    else:
+        transaction.on_commit(menu_item_cache.clear)
+
+
+"""
+[[Cart summary maintenance]]
+
+Purpose:
+    - Deleting a menu item deletes the cart lines holding it by
+    cascade, which bypasses the cart views that keep CartSummary current. The
+    owners of those lines are noted before the delete and their summaries are
+    rebuilt after it, inside the same transaction.
+"""
+@receiver(pre_delete, sender=MenuItem)
+def note_cart_owners(sender, instance, **kwargs):
+    instance._cart_user_ids = list(Cart.objects.filter(menu_item_id=instance.pk).values_list('user_id', flat=True))
+
+
+@receiver(post_delete, sender=MenuItem)
+def rebuild_cart_summaries(sender, instance, **kwargs):
+    cart_summary.rebuild_many(getattr(instance, '_cart_user_ids', ()))
+
+
+"""
+[[Search index sync]]
+
+Purpose:
+    - Reindexes a menu item when it is saved, every item of a category when the
+    category is saved (its title is part of the document) and drops deleted items.
+"""
+@receiver(post_save, sender=MenuItem)
+def index_menu_item(sender, instance, **kwargs):
+    search.index_menu_items(instance.pk)
+
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_menu_item(sender, instance, **kwargs):
+    search.remove_menu_items(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category_items(sender, instance, **kwargs):
+    search.index_category(instance.pk)
+
+
+"""
+[[Dispatch load tracking]]
+
+Purpose:
+    - Keeps the dispatch load table current when single orders are assigned,
+    delivered or deleted (the order views, the admin or the shell).
+    The stored assignment and status are read before a save (one query per write,
+    none when update_fields leaves both alone), so loading orders costs nothing.
+    A delete takes them from the instance being deleted.
+"""
+DISPATCH_FIELDS = {'delivery_crew', 'delivery_crew_id', 'status'}
+
+
+@receiver(pre_save, sender=Order)
+def remember_dispatch_state(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not DISPATCH_FIELDS & set(update_fields):
+        instance._dispatch_state = None
+    elif instance._state.adding or instance.pk is None:
+        instance._dispatch_state = (None, False)
+    else:
+        instance._dispatch_state = Order.objects.filter(pk=instance.pk).values_list('delivery_crew_id', 'status').first() or (None, False)
+
+
+@receiver(post_save, sender=Order)
+def track_dispatch_save(sender, instance, **kwargs):
+    before = getattr(instance, '_dispatch_state', None)
+    if before is not None:
+        load_table.moved(before, (instance.delivery_crew_id, instance.status))
+
+
+@receiver(post_delete, sender=Order)
+def track_dispatch_delete(sender, instance, **kwargs):
+    load_table.moved((instance.delivery_crew_id, instance.status), (None, False))
+
+
+"""
+[[Sales rollup maintenance]]
+
+Purpose:
+    - Takes a deleted order back out of the sales rollups. It runs before the
+    delete so that the order items are still there to be subtracted.
+"""
+@receiver(pre_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    analytics.order_removed(instance)
+
+
+"""
+[[Role invalidation]]
+
+Purpose:
+    - Drops the cached roles of every user whose groups change, either from the
+    group management endpoints (group.user_set.add/remove) or from user.groups.
+"""
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, User):
+        invalidate_roles(instance.pk)
+    elif action == 'pre_clear':
+        invalidate_roles(*instance.user_set.values_list('pk', flat=True))
+    elif pk_set:
+        invalidate_roles(*pk_set)
+
+
+"""
+[[Token cache invalidation]]
+
+Purpose:
+    - Forgets cached tokens when they are deleted (djoser logout deletes them),
+    when their user logs out and when their user is saved (e.g. deactivated).
+    The tokens are forgotten once the write commits: a request between the write
+    and the commit still reads the old rows and could cache the token again, and
+    a write that rolls back leaves the token valid.
+"""
+def forget_tokens_on_commit(*keys):
+    transaction.on_commit(lambda: token_cache.delete(*keys))
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_tokens_on_commit(instance.key)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_token(sender, request, user, **kwargs):
+    key = getattr(getattr(request, 'auth', None), 'key', None)
+    if key:
+        forget_tokens_on_commit(key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    keys = list(Token.objects.filter(user=instance).values_list('key', flat=True))
+    if keys:
+        forget_tokens_on_commit(*keys)
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from threading import RLock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+"""
+[[SQLite production profile]]
+
+Purpose:
+    - With SQLITE_PRODUCTION on (see settings.py), every new SQLite connection gets
+    the SQLITE_PRAGMAS: WAL journal so readers never wait for the writer,
+    synchronous=NORMAL (durable at checkpoints, safe with WAL), mmap and a larger
+    page cache. Connections are kept open between requests with CONN_MAX_AGE.
+
+    - SQLite allows one writer at a time and a deferred transaction that reads
+    before it writes cannot wait for the lock, it fails with "database is locked".
+    The profile opens every transaction with BEGIN IMMEDIATE (SQLITE_OPTIONS), so
+    writers in any worker process wait for the lock up to the busy timeout.
+
+    - write_transaction() replaces transaction.atomic() on the write paths
+    (cart, checkout, bulk import). On top of BEGIN IMMEDIATE it takes an
+    in-process writer lock, so threads of one worker queue on a Python lock
+    rather than polling SQLite's busy handler. This is an optimisation within a
+    process only; correctness across processes rests on BEGIN IMMEDIATE.
+    Other databases (and SQLite outside the profile) get a plain transaction.atomic().
+"""
+_writer_lock = RLock()
+
+
+def production_profile_enabled():
+    return getattr(settings, 'SQLITE_PRODUCTION', False) and connection.vendor == 'sqlite'
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_PRODUCTION', False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name}={value}')
+
+
+@contextmanager
+def write_transaction():
+    if not production_profile_enabled():
+        with transaction.atomic():
+            yield
+        return
+    with _writer_lock, transaction.atomic():
+        yield
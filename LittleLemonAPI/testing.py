@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db.models import Model
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+
+
+class LazyLoadError(AssertionError):
+    pass
+
+
+"""
+[[forbid_lazy_loads]]
+
+Purpose:
+    - Test helper that fails as soon as code inside the block reads a relation
+    (or a deferred field) that the queryset did not load up front.
+    Wrap serializer/view calls with it to catch N+1 regressions:
+
+        with forbid_lazy_loads():
+            CartSerializer(Cart.objects.select_related('menu_item__category'), many=True).data
+"""
+@contextmanager
+def forbid_lazy_loads():
+    def get_object(descriptor, instance):
+        raise LazyLoadError(
+            f"{type(instance).__name__}.{descriptor.field.name} was not loaded. "
+            f"Add it to select_related() on the queryset."
+        )
+
+    def refresh_from_db(instance, using=None, fields=None, **kwargs):
+        raise LazyLoadError(
+            f"{type(instance).__name__} deferred field(s) {fields} were not loaded. "
+            f"Remove them from only()/defer() on the queryset."
+        )
+
+    with mock.patch.object(ForwardManyToOneDescriptor, "get_object", get_object), \
+            mock.patch.object(Model, "refresh_from_db", refresh_from_db):
+        yield
+
+
+"""
+[[unindexed_plan_steps]]
+
+Purpose:
+    - Test helper that runs EXPLAIN QUERY PLAN (SQLite) on every SELECT captured by
+    CaptureQueriesContext and returns the plan steps that read a table without an
+    index: a bare "SCAN <table>" or a temp b-tree built to sort the result.
+    A bare scan is accepted when the query walks the table in primary key order
+    to fill a LIMITed page, since it stops after one page.
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/orders")
+        self.assertEqual(unindexed_plan_steps(queries), [])
+"""
+def unindexed_plan_steps(queries):
+    steps = []
+    for query in queries.captured_queries:
+        sql = query["sql"]
+        if not sql.startswith("SELECT"):
+            continue
+        with queries.connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+        for step in plan:
+            if step.startswith("SCAN ") and " USING " not in step:
+                table = step.split()[1]
+                if f'ORDER BY "{table}"."id" ASC LIMIT' in sql:
+                    continue
+                # values_list() orders by the column position when the id is selected first.
+                if sql.startswith(f'SELECT "{table}"."id" AS "id"') and "ORDER BY 1 ASC LIMIT" in sql:
+                    continue
+            elif "TEMP B-TREE" not in step:
+                continue
+            steps.append(f"{step} <- {sql}")
+    return steps
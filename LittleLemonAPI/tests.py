@@ -1,3 +1,1321 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import json
+import tempfile
+import threading
+import time
+import unittest
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.contrib.auth import authenticate
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Max, Sum
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
 
 # Create your tests here.
+from django.contrib.auth.models import User, Group
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .models import Category, MenuItem, Cart, CartSummary, Order, OrderItem, DailySales, DailyMenuItemSales, IdempotencyKey
+from . import analytics, async_views, checkout, compact, dispatch, idempotency, renderers, urls
+from .dispatch import load_table
+from .authentication import token_cache
+from .benchmarks import use_async_read_endpoints
+from .cache import CatalogCache, LRUBackend, catalog_cache, menu_item_cache
+from .instrumentation import registry
+from .prices import price_index
+from .renderers import FastJSONRenderer, FastJSONParser
+from .menu_import import import_menu_items
+from .serializers import MenuItemSerializer, CartSerializer
+from .profiler import RepeatedQueryError, fingerprint, profile_queries
+from .testing import forbid_lazy_loads, LazyLoadError, unindexed_plan_steps
+
+
+class NPlusOneTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="customer")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.user).key)
+        category = Category.objects.create(slug="mains", title="Mains")
+        for i in range(3):
+            menu_item = MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=category)
+            Cart.objects.create(user=self.user, menu_item=menu_item, quantity=2, unit_price="5.00", price="10.00")
+
+    def test_helper_catches_unloaded_relation(self):
+        menu_item = MenuItem.objects.first()
+        with self.assertRaises(LazyLoadError), forbid_lazy_loads():
+            menu_item.category
+
+    def test_menu_items_list(self):
+        with forbid_lazy_loads():
+            response = self.client.get("/api/menu-items")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_cart_list(self):
+        with forbid_lazy_loads():
+            response = self.client.get("/api/cart/menu-items")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["menu_item"]["category"]["title"], "Mains")
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        self.crew = User.objects.create(username="crew")
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Delivery crew").user_set.add(self.crew)
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        for i in range(5):
+            menu_item = MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=i % 2 == 0, category=self.category)
+            Cart.objects.create(user=self.customer, menu_item=menu_item, quantity=1, unit_price="5.00", price="5.00")
+        for i in range(5):
+            Order.objects.create(user=self.customer, delivery_crew=self.crew if i % 2 else None, total="5.00", date="2023-06-14")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def assertIndexed(self, user, url):
+        client = self.client_for(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(unindexed_plan_steps(queries), [], url)
+
+    def test_menu_items(self):
+        category = self.category.pk
+        for url in [
+            "/api/menu-items",
+            "/api/menu-items?ordering=price",
+            "/api/menu-items?ordering=-title",
+            f"/api/menu-items?category={category}&ordering=title",
+            f"/api/menu-items?category={category}&featured=true&ordering=price",
+            f"/api/menu-items/{MenuItem.objects.first().pk}",
+        ]:
+            self.assertIndexed(self.customer, url)
+
+    def test_cart(self):
+        self.assertIndexed(self.customer, "/api/cart/menu-items")
+        self.assertIndexed(self.customer, "/api/cart/summary")
+
+    def test_customer_orders(self):
+        self.assertIndexed(self.customer, "/api/orders")
+        self.assertIndexed(self.customer, f"/api/orders/{Order.objects.first().pk}")
+
+    def test_delivery_crew_orders(self):
+        self.assertIndexed(self.crew, "/api/orders")
+        self.assertIndexed(self.crew, "/api/orders?status=false")
+        self.assertIndexed(self.crew, "/api/orders/dispatch/pending")
+        self.assertIndexed(self.crew, "/api/orders/dispatch/pending?ordering=date")
+
+    def test_manager_orders(self):
+        self.assertIndexed(self.manager, "/api/orders")
+        self.assertIndexed(self.manager, "/api/orders?ordering=status")
+        self.assertIndexed(self.manager, "/api/orders/export")
+
+
+class MenuSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=User.objects.create(username="customer")).key)
+        self.mains = Category.objects.create(slug="mains", title="Mains")
+        self.desserts = Category.objects.create(slug="desserts", title="Desserts")
+        MenuItem.objects.create(title="Chicken Salad", price="7.00", featured=True, category=self.mains)
+        MenuItem.objects.create(title="Chocolate Cake", price="5.00", featured=False, category=self.desserts)
+        MenuItem.objects.create(title="Desserts Platter", price="9.00", featured=False, category=self.mains)
+
+    def search(self, term, **params):
+        response = self.client.get("/api/menu-items", {"search": term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_prefix_match_on_every_word(self):
+        self.assertEqual(self.search("chick sal"), ["Chicken Salad"])
+        self.assertEqual(self.search("ch"), ["Chicken Salad", "Chocolate Cake"])
+        self.assertEqual(self.search("cake zzz"), [])
+
+    def test_title_matches_rank_above_category_matches(self):
+        self.assertEqual(self.search("dessert"), ["Desserts Platter", "Chocolate Cake"])
+        self.assertEqual(self.search("dessert", ordering="price"), ["Chocolate Cake", "Desserts Platter"])
+
+    def test_index_follows_writes(self):
+        self.desserts.title = "Sweets"
+        self.desserts.save()
+        self.assertEqual(self.search("sweet"), ["Chocolate Cake"])
+
+        MenuItem.objects.filter(title="Chocolate Cake").delete()
+        self.assertEqual(self.search("sweet"), [])
+
+        import_menu_items([{"title": "Lemon Tart", "price": "4.00", "featured": False, "category_id": self.desserts.pk}])
+        self.assertEqual(self.search("tart"), ["Lemon Tart"])
+
+
+class DispatchTest(TestCase):
+    def setUp(self):
+        crew_group = Group.objects.create(name="Delivery crew")
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        self.crew = [User.objects.create(username=f"crew{i}") for i in range(2)]
+        crew_group.user_set.add(*self.crew)
+        customer = User.objects.create(username="customer")
+        self.orders = [Order.objects.create(user=customer, total="5.00", date=f"2023-06-1{i}") for i in range(5)]
+        load_table.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def pending(self, crew):
+        response = self.client_for(crew).get("/api/orders/dispatch/pending?ordering=date")
+        self.assertEqual(response.status_code, 200)
+        return [order["id"] for order in response.data["data"]]
+
+    def test_bulk_assign(self):
+        order_ids = [order.pk for order in self.orders[:2]]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.manager).post(
+                "/api/orders/dispatch/assign", {"order_ids": order_ids + [0], "delivery_crew_id": self.crew[0].pk}, format="json")
+        self.assertEqual(response.data["data"], {"assigned": order_ids, "not_found": [0]})
+        self.assertEqual(self.pending(self.crew[0]), order_ids)
+        self.assertEqual(load_table.snapshot(), {self.crew[0].pk: 2})
+
+    def test_auto_assign_balances_load(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatch.assign([self.orders[0].pk, self.orders[1].pk], self.crew[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.manager).post("/api/orders/dispatch/auto-assign", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.pending(self.crew[1]), [order.pk for order in self.orders[2:4]])
+        self.assertEqual(len(self.pending(self.crew[0])), 3)
+        self.assertEqual(load_table.snapshot(), {self.crew[0].pk: 3, self.crew[1].pk: 2})
+
+    def test_auto_assign_more_orders_than_one_batch(self):
+        customer = User.objects.get(username="customer")
+        Order.objects.bulk_create([Order(user=customer, total="5.00", date="2023-06-20") for _ in range(1200)])
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            assignments = dispatch.auto_assign()
+        updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+        # 1205 orders: three batches, one UPDATE per crew member in each.
+        self.assertEqual(len(updates), 6)
+        self.assertEqual(sorted(len(assigned) for assigned in assignments.values()), [602, 603])
+        self.assertFalse(Order.objects.filter(delivery_crew__isnull=True).exists())
+        for crew in self.crew:
+            self.assertEqual(Order.objects.filter(delivery_crew=crew).count(), len(assignments[crew.pk]))
+        self.assertEqual(load_table.snapshot(), {crew_id: len(assigned) for crew_id, assigned in assignments.items()})
+
+    def test_auto_assign_leaves_orders_assigned_meanwhile(self):
+        load_table.snapshot()
+
+        def snapshot():
+            # A manager assigns the oldest order between auto_assign's read and its UPDATE.
+            dispatch.assign([self.orders[0].pk], self.crew[1].pk)
+            return {}
+
+        with mock.patch.object(load_table, "snapshot", side_effect=snapshot), self.captureOnCommitCallbacks(execute=True):
+            assignments = dispatch.auto_assign()
+        self.assertEqual(assignments, {
+            self.crew[0].pk: [self.orders[2].pk, self.orders[4].pk],
+            self.crew[1].pk: [self.orders[1].pk, self.orders[3].pk],
+        })
+        self.assertEqual(Order.objects.get(pk=self.orders[0].pk).delivery_crew, self.crew[1])
+        self.assertEqual(load_table.snapshot(), {self.crew[0].pk: 2, self.crew[1].pk: 3})
+
+    def test_loading_orders_does_not_track_dispatch_state(self):
+        self.assertFalse(any(hasattr(order, "_dispatch_state") for order in Order.objects.all()))
+
+    def test_delivery_updates_load(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatch.assign([self.orders[0].pk], self.crew[0].pk)
+        self.assertEqual(load_table.snapshot(), {self.crew[0].pk: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.crew[0]).patch(f"/api/orders/{self.orders[0].pk}", {"status": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(load_table.snapshot(), {self.crew[0].pk: 0})
+        self.assertEqual(self.pending(self.crew[0]), [])
+
+
+class SalesRollupTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_items = [MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=category) for i in range(2)]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def order(self, date, quantities):
+        client = self.client_for(self.customer)
+        for menu_item, quantity in zip(self.menu_items, quantities):
+            if quantity:
+                client.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": quantity}, format="json")
+        self.assertEqual(client.post("/api/orders", {"date": date}, format="json").status_code, 201)
+
+    def rollups(self):
+        return (
+            list(DailySales.objects.order_by("date").values_list("date", "order_count", "item_count", "revenue")),
+            sorted(DailyMenuItemSales.objects.values_list("date", "menu_item_id", "quantity", "revenue")),
+        )
+
+    def test_orders_update_rollups_incrementally(self):
+        self.order("2023-06-14", [2, 1])
+        self.order("2023-06-14", [1, 0])
+        self.order("2023-06-15", [0, 3])
+        Order.objects.filter(date="2023-06-15").get().delete()
+
+        incremental = self.rollups()
+        list(analytics.rebuild(chunk_days=1))
+        self.assertEqual(self.rollups(), incremental)
+        self.assertEqual(incremental[0], [(datetime.date(2023, 6, 14), 2, 4, Decimal("20.00"))])
+
+    def test_report_endpoints(self):
+        self.order("2023-06-14", [2, 1])
+        self.order("2023-06-15", [0, 3])
+        client = self.client_for(self.manager)
+
+        response = client.get("/api/reports/sales/daily", {"date_from": "2023-06-15"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"], {"order_count": 1, "item_count": 3, "revenue": Decimal("15.00")})
+
+        response = client.get("/api/reports/sales/top-items", {"limit": 1})
+        self.assertEqual(response.data["data"], [{"menu_item_id": self.menu_items[1].pk, "title": "Item 1", "quantity": 4, "revenue": Decimal("20.00")}])
+
+        self.assertEqual(self.client_for(self.customer).get("/api/reports/sales/daily").status_code, 403)
+
+
+class RoleCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager_group = Group.objects.create(name="Manager")
+        self.manager = User.objects.create(username="manager")
+        self.manager_group.user_set.add(self.manager)
+        self.customer = User.objects.create(username="customer")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def is_manager(self):
+        # /api/metrics is open to managers only (METRICS_ALLOWED_IPS is empty).
+        return self.client_for(self.customer).get("/api/metrics").status_code == 200
+
+    def test_roles_are_cached_across_requests(self):
+        self.assertFalse(self.is_manager())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(self.is_manager())
+        self.assertFalse([query["sql"] for query in queries if '"auth_group"' in query["sql"]])
+
+    def test_group_changes_from_the_endpoints_apply_on_the_next_request(self):
+        self.assertFalse(self.is_manager())
+        manager = self.client_for(self.manager)
+        self.assertEqual(manager.post("/api/groups/manager/users", {"username": "customer"}, format="json").status_code, 201)
+        self.assertTrue(self.is_manager())
+        self.assertEqual(manager.delete(f"/api/groups/manager/users/{self.customer.pk}").status_code, 200)
+        self.assertFalse(self.is_manager())
+
+    def test_group_changes_from_either_side_of_the_relation(self):
+        self.assertFalse(self.is_manager())
+        self.customer.groups.add(self.manager_group)
+        self.assertTrue(self.is_manager())
+        self.customer.groups.clear()
+        self.assertFalse(self.is_manager())
+        self.manager_group.user_set.add(self.customer)
+        self.assertTrue(self.is_manager())
+        self.manager_group.user_set.clear()
+        self.assertFalse(self.is_manager())
+
+
+class CheckoutTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        category = Category.objects.create(slug="mains", title="Mains")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.customer).key)
+        for i, price in enumerate(["5.00", "7.50"]):
+            menu_item = MenuItem.objects.create(title=f"Item {i}", price=price, featured=False, category=category)
+            self.client.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 2}, format="json")
+
+    def test_places_the_whole_cart(self):
+        order, order_items = checkout.place_order(self.customer, "2023-06-14")
+        self.assertEqual(order.total, Decimal("25.00"))
+        self.assertEqual([(item["quantity"], item["price"]) for item in order_items], [(2, Decimal("10.00")), (2, Decimal("15.00"))])
+        self.assertFalse(Cart.objects.exists())
+        self.assertEqual(CartSummary.objects.get(user=self.customer).line_count, 0)
+
+    def test_the_order_total_is_the_cart_summary(self):
+        # A line written outside the API leaves the summary one line short: it is rebuilt first.
+        menu_item = MenuItem.objects.create(title="Extra", price="5.00", featured=False, category=Category.objects.get())
+        Cart.objects.create(user=self.customer, menu_item=menu_item, quantity=1, unit_price="5.00", price="5.00")
+        order, order_items = checkout.place_order(self.customer, "2023-06-14")
+        self.assertEqual(order.total, Decimal("30.00"))
+        self.assertEqual(len(order_items), 3)
+
+    def test_failure_rolls_back_the_whole_checkout(self):
+        cart = list(Cart.objects.order_by("id").values_list("id", "quantity", "price"))
+        with mock.patch.object(analytics, "order_placed", side_effect=RuntimeError("rollup failed")):
+            with self.assertRaises(RuntimeError):
+                checkout.place_order(self.customer, "2023-06-14")
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(list(Cart.objects.order_by("id").values_list("id", "quantity", "price")), cart)
+        summary = CartSummary.objects.get(user=self.customer)
+        self.assertEqual((summary.line_count, summary.item_count, summary.subtotal), (2, 4, Decimal("25.00")))
+
+
+class IdempotencyTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_items = [MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=category) for i in range(2)]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.customer).key)
+
+    def add_to_cart(self, menu_item):
+        self.client.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 1}, format="json")
+
+    def place(self, key, date="2023-06-14"):
+        return self.client.post("/api/orders", {"date": date}, format="json", headers={"Idempotency-Key": key})
+
+    def test_retry_replays_the_first_response(self):
+        self.add_to_cart(self.menu_items[0])
+        first = self.place("order-1")
+        self.assertEqual(first.status_code, 201)
+
+        self.add_to_cart(self.menu_items[1])
+        with self.assertNumQueries(1):
+            retry = self.place("order-1")
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Cart.objects.filter(user=self.customer).count(), 1)
+
+        self.assertEqual(self.place("order-1", "2023-06-15").status_code, 422)
+        self.assertEqual(self.place("order-2").status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_empty_cart_places_no_order(self):
+        self.assertEqual(self.client.post("/api/orders", {"date": "2023-06-14"}, format="json").status_code, 400)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_expired_keys_are_purged_and_reusable(self):
+        self.add_to_cart(self.menu_items[0])
+        self.place("order-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        self.add_to_cart(self.menu_items[1])
+        self.assertEqual(self.place("order-1").status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+        IdempotencyKey.objects.bulk_create([
+            IdempotencyKey(user=self.customer, key=f"old-{i}", fingerprint="", status_code=201, response="{}", expires_at=timezone.now())
+            for i in range(5)
+        ])
+        self.assertEqual(idempotency.purge_expired(batch_size=2), 5)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["order-1"])
+
+
+class PriceIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        price_index.clear()
+        self.customer = User.objects.create(username="customer")
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_item = MenuItem.objects.create(title="Item", price="5.00", featured=False, category=self.category)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.customer).key)
+
+    def add_to_cart(self, menu_item_id, quantity=1):
+        return self.client.post("/api/cart/menu-items", {"menu_item_id": menu_item_id, "quantity": quantity}, format="json")
+
+    def test_warm_cart_and_checkout_do_not_read_menu_items(self):
+        self.add_to_cart(self.menu_item.pk)
+        Cart.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.add_to_cart(self.menu_item.pk, 2).status_code, 201)
+            self.assertEqual(self.client.post("/api/orders", {"date": "2023-06-14"}, format="json").status_code, 201)
+        self.assertFalse([query["sql"] for query in queries if 'FROM "LittleLemonAPI_menuitem"' in query["sql"]])
+        self.assertEqual(Order.objects.get().total, Decimal("10.00"))
+
+    def test_price_changes_and_new_items_are_picked_up(self):
+        self.add_to_cart(self.menu_item.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_item.price = Decimal("7.50")
+            self.menu_item.save()
+        # Bulk writes send no signal, a miss falls back to the database.
+        new_item, = MenuItem.objects.bulk_create([MenuItem(title="New", price="3.00", featured=False, category=self.category)])
+        Cart.objects.all().delete()
+        self.add_to_cart(self.menu_item.pk)
+        self.add_to_cart(new_item.pk)
+        self.assertEqual(sorted(Cart.objects.values_list("unit_price", flat=True)), [Decimal("3.00"), Decimal("7.50")])
+
+    def test_misses_do_not_mutate_handed_out_snapshots(self):
+        snapshot = price_index.snapshot()
+        new_item, = MenuItem.objects.bulk_create([MenuItem(title="New", price="3.00", featured=False, category=self.category)])
+        self.assertEqual(price_index.get(new_item.pk).price, Decimal("3.00"))
+        self.assertNotIn(new_item.pk, snapshot)
+        with self.assertNumQueries(0):
+            self.assertEqual(set(price_index.get_many([self.menu_item.pk, new_item.pk])), {self.menu_item.pk, new_item.pk})
+
+    def test_invalid_lines_are_rejected(self):
+        self.assertEqual(self.add_to_cart(self.menu_item.pk + 100).status_code, 404)
+        self.assertEqual(self.add_to_cart(self.menu_item.pk, 0).status_code, 400)
+        self.assertEqual(self.add_to_cart("x").status_code, 400)
+        self.assertFalse(Cart.objects.exists())
+
+
+class CartBatchTest(TestCase):
+    def setUp(self):
+        price_index.clear()
+        self.customer = User.objects.create(username="customer")
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_items = [
+            MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=self.category) for i in range(4)
+        ]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.customer).key)
+        for menu_item in self.menu_items[:3]:
+            self.client.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 2}, format="json")
+
+    def batch(self, operations):
+        return self.client.post("/api/cart/menu-items/batch", operations, format="json")
+
+    def test_operations_are_applied_in_order(self):
+        first, second, third, fourth = [menu_item.pk for menu_item in self.menu_items]
+        response = self.batch([
+            {"op": "set", "menu_item_id": first, "quantity": 5},
+            {"op": "increment", "menu_item_id": second, "quantity": -1},
+            {"op": "remove", "menu_item_id": third},
+            {"op": "increment", "menu_item_id": fourth, "quantity": 1},
+            {"op": "increment", "menu_item_id": fourth, "quantity": 2},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dict(Cart.objects.values_list("menu_item_id", "quantity")), {first: 5, second: 1, fourth: 3})
+        self.assertEqual({line["menu_item"]["id"]: line["quantity"] for line in response.data["data"]}, {first: 5, second: 1, fourth: 3})
+        self.assertEqual(Cart.objects.get(menu_item_id=fourth).price, Decimal("15.00"))
+        self.assertEqual(response.data["summary"], {"line_count": 3, "item_count": 9, "subtotal": Decimal("45.00")})
+        self.assertEqual(CartSummary.objects.get(user=self.customer).subtotal, Decimal("45.00"))
+
+    def test_lines_are_listed_like_the_cart(self):
+        response = self.batch([{"menu_item_id": self.menu_items[3].pk, "quantity": 1}])
+        self.assertEqual(response.status_code, 200)
+        listed = self.client.get("/api/cart/menu-items").data["results"]
+        self.assertEqual([line["id"] for line in response.data["data"]][:len(listed)], [line["id"] for line in listed])
+        self.assertEqual([line["id"] for line in response.data["data"]], sorted(Cart.objects.values_list("id", flat=True)))
+
+    def test_invalid_batch_writes_nothing(self):
+        response = self.batch([
+            {"op": "set", "menu_item_id": self.menu_items[0].pk, "quantity": 1},
+            {"op": "set", "menu_item_id": self.menu_items[3].pk + 100, "quantity": 1},
+            {"op": "bogus", "menu_item_id": self.menu_items[1].pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row["status"] for row in response.data["data"]], ["ok", "error", "error"])
+        self.assertEqual(set(Cart.objects.values_list("quantity", flat=True)), {2})
+        self.assertEqual(self.batch({"menu_item_id": self.menu_items[0].pk}).status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        first, second, third, fourth = [menu_item.pk for menu_item in self.menu_items]
+        with CaptureQueriesContext(connection) as small:
+            self.batch([{"menu_item_id": first, "quantity": 3}, {"op": "remove", "menu_item_id": third}])
+        with CaptureQueriesContext(connection) as large:
+            self.batch([
+                {"menu_item_id": first, "quantity": 1},
+                {"menu_item_id": second, "quantity": 5},
+                {"menu_item_id": third, "quantity": 1},
+                {"op": "remove", "menu_item_id": fourth},
+                {"op": "remove", "menu_item_id": first},
+            ])
+        self.assertEqual(len(small), len(large))
+
+
+class SQLiteWriterTest(unittest.TestCase):
+    """
+    Threads with their own connections to a file database, standing in for worker
+    processes: the in-process writer lock is not taken, only BEGIN IMMEDIATE orders them.
+    """
+    def setUp(self):
+        self.enterContext(override_settings(SQLITE_PRODUCTION=True))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings["workers"] = connections.configure_settings({"default": {}, "workers": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": f"{directory.name}/db.sqlite3",
+            "OPTIONS": settings.SQLITE_OPTIONS,
+        }})["workers"]
+        self.addCleanup(connections.settings.pop, "workers")
+        self.addCleanup(connections["workers"].close)
+        with connections["workers"].cursor() as cursor:
+            cursor.execute("CREATE TABLE counter (value integer NOT NULL)")
+            cursor.execute("INSERT INTO counter VALUES (0)")
+
+    def increment(self, times, errors):
+        try:
+            for _ in range(times):
+                # Read, then write: a deferred transaction fails here with "database is locked".
+                with transaction.atomic(using="workers"), connections["workers"].cursor() as cursor:
+                    cursor.execute("SELECT value FROM counter")
+                    value, = cursor.fetchone()
+                    cursor.execute("UPDATE counter SET value = %s", [value + 1])
+        except OperationalError as error:
+            errors.append(error)
+        finally:
+            connections["workers"].close()
+
+    def test_concurrent_read_then_write_transactions(self):
+        errors = []
+        threads = [threading.Thread(target=self.increment, args=(25, errors)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with connections["workers"].cursor() as cursor:
+            cursor.execute("SELECT value FROM counter")
+            self.assertEqual(cursor.fetchone(), (200,))
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def worker(self):
+        # Another process: its own in-process entries, the same shared version counter.
+        return CatalogCache(LRUBackend())
+
+    def test_write_in_one_worker_invalidates_the_others(self):
+        first, second = self.worker(), self.worker()
+        request = self.factory.get("/api/menu-items", {"page": 2})
+        self.assertEqual(first.get_or_set(request, lambda: "v1"), ("v1", False))
+        self.assertEqual(first.get_or_set(request, lambda: "unused"), ("v1", True))
+        second.bump()
+        self.assertEqual(first.get_or_set(request, lambda: "v2"), ("v2", False))
+        self.assertEqual(first.stats()["version"], second.stats()["version"])
+
+    def test_lost_version_does_not_revive_old_entries(self):
+        worker = self.worker()
+        request = self.factory.get("/api/menu-items")
+        worker.get_or_set(request, lambda: "old")
+        cache.clear()
+        self.assertEqual(worker.get_or_set(request, lambda: "new"), ("new", False))
+
+    def test_page_built_before_the_write_commits_is_not_kept(self):
+        category = Category.objects.create(slug="mains", title="Mains")
+        request = self.factory.get("/api/menu-items")
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(title="New", price="5.00", featured=False, category=category)
+            # Another connection, which cannot see the uncommitted row yet, fills the cache.
+            self.assertEqual(catalog_cache.get_or_set(request, lambda: "without New"), ("without New", False))
+        self.assertEqual(catalog_cache.get_or_set(request, lambda: "with New"), ("with New", False))
+
+    def test_counters_are_exact_under_threads(self):
+        worker = self.worker()
+        request = self.factory.get("/api/menu-items")
+        threads = [threading.Thread(target=lambda: [worker.get_or_set(request, lambda: "page") for _ in range(200)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = worker.stats()
+        self.assertEqual(stats["hits"] + stats["misses"], 1600)
+
+
+class RenderedMenuItemTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        menu_item_cache.clear()
+        self.customer = User.objects.create(username="customer")
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_item = MenuItem.objects.create(title="Item", price="5.00", featured=False, category=category)
+        self.path = f"/api/menu-items/{self.menu_item.pk}"
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def test_etag_and_not_modified(self):
+        client = self.client_for(self.customer)
+        response = client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"], self.customer.pk)
+        etag = response["ETag"]
+        response = client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        # The ETag covers the user id that leads the body.
+        self.assertNotEqual(self.client_for(self.manager).get(self.path)["ETag"], etag)
+
+    def test_patch_invalidates(self):
+        client = self.client_for(self.customer)
+        etag = client.get(self.path)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.manager).patch(self.path, {"price": "6.50"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["price"], "6.50")
+
+    def test_bytes_rendered_before_the_write_commits_are_not_kept(self):
+        client = self.client_for(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client_for(self.manager).patch(self.path, {"price": "6.50"}, format="json").status_code, 200)
+            # Another connection renders the old row under the version bumped by the write.
+            menu_item_cache.set(self.menu_item.pk, catalog_cache.version(), b'"price":"5.00"}', "stale")
+        response = client.get(self.path, HTTP_IF_NONE_MATCH=f'"stale-{self.customer.pk}"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["price"], "6.50")
+
+    def test_write_in_another_worker_invalidates(self):
+        client = self.client_for(self.customer)
+        etag = client.get(self.path)["ETag"]
+        # Another worker's write: no signal here, only the shared version moves.
+        MenuItem.objects.filter(pk=self.menu_item.pk).update(price="7.00")
+        CatalogCache(LRUBackend()).bump()
+        response = client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["price"], "7.00")
+
+
+class TokenRevocationTest(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create(username="customer")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.assertEqual(self.client.get("/api/cart/summary").status_code, 200)
+
+    def test_logout_denies_the_next_request(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post("/auth/token/logout/").status_code, 204)
+        self.assertEqual(self.client.get("/api/cart/summary").status_code, 401)
+
+    def test_token_deletion_denies_the_next_request(self):
+        key = self.token.key
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            # A request on another connection, which still sees the token, caches it again.
+            token_cache.set(key, self.user, self.token)
+        self.assertIsNone(token_cache.get(key))
+        self.assertEqual(self.client.get("/api/cart/summary").status_code, 401)
+
+    def test_rolled_back_deletion_keeps_the_token(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertRaises(RuntimeError), transaction.atomic():
+            Token.objects.filter(pk=self.token.pk).delete()
+            raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertIsNotNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get("/api/cart/summary").status_code, 200)
+
+    def test_revocation_by_another_process_is_seen_within_local_ttl(self):
+        # Deleted without signals, as another worker's delete looks from here.
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM authtoken_token WHERE key = %s", [self.token.key])
+        later = time.monotonic() + token_cache.local_ttl + 0.1
+        with mock.patch("LittleLemonAPI.authentication.time.monotonic", return_value=later):
+            self.assertEqual(self.client.get("/api/cart/summary").status_code, 401)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.customer).key)
+        # Ties on both orderings: two dates and three totals over ten orders.
+        self.orders = [
+            Order.objects.create(user=self.customer, total=["5.00", "7.50", "9.00"][i % 3], date=["2023-06-14", "2023-06-15"][i % 2])
+            for i in range(10)
+        ]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["data"]), 3)
+            ids += [row["id"] for row in response.data["data"]]
+            url = response.data["next"]
+        return ids
+
+    def test_descending_pages_cover_every_order_once(self):
+        expected = list(Order.objects.order_by("-date", "-id").values_list("id", flat=True))
+        self.assertEqual(self.walk("/api/orders?page_size=3"), expected)
+
+    def test_ascending_pages_cover_every_order_once(self):
+        expected = list(Order.objects.order_by("total", "id").values_list("id", flat=True))
+        self.assertEqual(self.walk("/api/orders?page_size=3&ordering=total"), expected)
+
+    def test_invalid_cursor(self):
+        encode = lambda value: base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+        for cursor in ["!!!", encode([1]), encode(5), encode([1, 2, 3]), encode(["2023-06-14", "x"]), encode(["not a date", 1]), encode([None, 1])]:
+            self.assertEqual(self.client.get("/api/orders", {"cursor": cursor}).status_code, 404, cursor)
+
+
+class AsyncReadViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.customer = User.objects.create(username="customer")
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        category = Category.objects.create(slug="mains", title="Mains")
+        menu_items = [MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=category) for i in range(4)]
+        self.tokens = {user: Token.objects.create(user=user).key for user in [self.customer, self.manager]}
+        client = self.client_for(self.customer)
+        # Cart ids run against menu item ids, so a listing in menu item order would differ.
+        for menu_item in reversed(menu_items[:3]):
+            client.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 2}, format="json")
+        orders = [Order.objects.create(user=self.customer, total="5.00", date=f"2023-06-1{i}") for i in range(5)]
+
+        # Responses of the sync views, which also warm the catalog cache the async menu view reads.
+        urls = [
+            "/api/menu-items", "/api/menu-items?page=2", "/api/menu-items?featured=False",
+            "/api/cart/menu-items", "/api/orders", f"/api/orders/{orders[0].pk}", "/api/orders?status=0",
+        ]
+        self.expected = [(self.customer, url, self.get(self.customer, url)) for url in urls]
+        for user in [self.customer, self.manager]:
+            first = self.client_for(user).get("/api/orders")
+            self.expected.append((user, first.data["next"], self.get(user, first.data["next"])))
+        self.expected.append((self.manager, f"/api/orders/{orders[0].pk}", self.get(self.manager, f"/api/orders/{orders[0].pk}")))
+
+        self.addCleanup(use_async_read_endpoints, False)
+        use_async_read_endpoints(True)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + self.tokens[user])
+        return client
+
+    def get(self, user, url):
+        response = self.client_for(user).get(url)
+        return response.status_code, response.content
+
+    async def test_payloads_match_the_sync_views(self):
+        self.assertIs(resolve("/api/orders").func, async_views.orders)
+        # Served by the async handlers themselves, none is delegated to the sync view.
+        with mock.patch.object(async_views, "sync_to_async", side_effect=AssertionError("delegated to the sync view")):
+            for user, url, expected in self.expected:
+                with self.subTest(user=user.username, url=url):
+                    response = await self.async_client.get(url, headers={"Authorization": "Token " + self.tokens[user]})
+                    self.assertEqual((response.status_code, response.content), expected)
+
+    async def test_menu_listing_is_built_on_a_catalog_cache_miss(self):
+        catalog_cache.bump()
+        with mock.patch.object(async_views, "sync_to_async", side_effect=AssertionError("delegated to the sync view")):
+            for user, url, expected in self.expected[:2]:
+                with self.subTest(url=url):
+                    response = await self.async_client.get(url, headers={"Authorization": "Token " + self.tokens[user]})
+                    self.assertEqual(response["X-Catalog-Cache"], "MISS")
+                    self.assertEqual((response.status_code, response.content), expected)
+
+
+class OrderExportTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.manager).key)
+        category = Category.objects.create(slug="mains", title="Mains")
+        menu_item = MenuItem.objects.create(title="Item", price="5.00", featured=False, category=category)
+        self.delivered = Order.objects.create(user=self.customer, status=True, total="10.00", date="2023-06-15")
+        OrderItem.objects.create(order=self.delivered, menu_item=menu_item, quantity=2, unit_price="5.00", price="10.00")
+        self.pending = Order.objects.create(user=self.customer, status=False, total="0.00", date="2023-06-14")
+
+    def export(self, **params):
+        response = self.client.get("/api/orders/export", params)
+        return response, b"".join(response.streaming_content).decode() if response.streaming else None
+
+    def test_ndjson(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        orders = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([order["id"] for order in orders], [self.pending.pk, self.delivered.pk])
+        self.assertEqual(orders[0]["items"], [])
+        self.assertEqual(orders[1]["total"], "10.00")
+        self.assertEqual(orders[1]["items"][0]["quantity"], 2)
+
+    def test_csv(self):
+        response, body = self.export(type="csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(StringIO(body)))
+        self.assertEqual(rows[0][:2], ["order_id", "order_user_id"])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][0], str(self.delivered.pk))
+        self.assertEqual(rows[2][-1], "10.00")
+
+    def test_filters(self):
+        ids = lambda **params: [json.loads(line)["id"] for line in self.export(**params)[1].splitlines()]
+        self.assertEqual(ids(status="1"), [self.delivered.pk])
+        self.assertEqual(ids(status="false"), [self.pending.pk])
+        self.assertEqual(ids(date_from="2023-06-15"), [self.delivered.pk])
+        self.assertEqual(ids(date_to="2023-06-14"), [self.pending.pk])
+
+    def test_invalid_filters(self):
+        for params in [{"status": "foo"}, {"status": ""}, {"date_from": "June"}]:
+            self.assertEqual(self.export(**params)[0].status_code, 400, params)
+
+
+class MenuImportTest(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.manager).key)
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_item = MenuItem.objects.create(title="Old", price="5.00", featured=False, category=self.category)
+
+    def test_mixed_create_and_update(self):
+        response = self.client.post("/api/menu-items/bulk", [
+            {"title": "New", "price": "6.00", "featured": True, "category_id": self.category.pk},
+            {"id": self.menu_item.pk, "title": "Renamed", "price": "5.50", "featured": False, "category_id": self.category.pk},
+        ], format="json")
+        self.assertEqual(response.status_code, 200)
+        created = MenuItem.objects.get(title="New")
+        self.assertEqual(response.data["data"], [
+            {"row": 0, "status": "created", "id": created.pk},
+            {"row": 1, "status": "updated", "id": self.menu_item.pk},
+        ])
+        self.menu_item.refresh_from_db()
+        self.assertEqual((self.menu_item.title, self.menu_item.price), ("Renamed", Decimal("5.50")))
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile("menu.csv", (
+            "id,title,price,featured,category_id\n"
+            f",Soup,4.25,true,{self.category.pk}\n"
+            f"{self.menu_item.pk},Old,5.75,false,{self.category.pk}\n"
+        ).encode())
+        response = self.client.post("/api/menu-items/bulk", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["status"] for row in response.data["data"]], ["created", "updated"])
+        self.assertEqual(MenuItem.objects.get(title="Soup").price, Decimal("4.25"))
+        self.assertEqual(MenuItem.objects.get(pk=self.menu_item.pk).price, Decimal("5.75"))
+
+    def test_invalid_rows_write_nothing(self):
+        response = self.client.post("/api/menu-items/bulk", [
+            {"title": "Fine", "price": "6.00", "featured": True, "category_id": self.category.pk},
+            {"title": "No category", "price": "6.00", "featured": True, "category_id": self.category.pk + 100},
+            {"id": self.menu_item.pk + 100, "title": "Gone", "price": "6.00", "featured": True, "category_id": self.category.pk},
+            {"title": "Bad price", "price": "-1", "featured": True, "category_id": self.category.pk},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        results = response.data["data"]
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1], {"row": 1, "status": "error", "errors": {"category_id": ["Category not found."]}})
+        self.assertEqual(results[2]["errors"], {"id": ["Menu item not found."]})
+        self.assertIn("price", results[3]["errors"])
+        self.assertEqual(list(MenuItem.objects.values_list("title", flat=True)), ["Old"])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post("/api/menu-items/bulk", {"title": "x"}, format="json").status_code, 400)
+        customer = APIClient()
+        customer.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=User.objects.create(username="customer")).key)
+        self.assertEqual(customer.post("/api/menu-items/bulk", [], format="json").status_code, 403)
+
+
+class CartSummaryTest(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.manager = User.objects.create(username="manager")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        self.kept, self.deleted = [
+            MenuItem.objects.create(title=title, price="5.00", featured=False, category=self.category) for title in ["Kept", "Deleted"]
+        ]
+        self.customers = [User.objects.create(username=f"customer-{i}") for i in range(2)]
+        for customer in self.customers:
+            client = self.client_for(customer)
+            client.post("/api/cart/menu-items", {"menu_item_id": self.kept.pk, "quantity": 1}, format="json")
+            client.post("/api/cart/menu-items", {"menu_item_id": self.deleted.pk, "quantity": 2}, format="json")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def summaries(self):
+        return {
+            summary.user_id: (summary.line_count, summary.item_count, summary.subtotal)
+            for summary in CartSummary.objects.filter(user__in=self.customers)
+        }
+
+    def test_deleting_a_menu_item_in_carts(self):
+        self.assertEqual(self.summaries()[self.customers[0].pk], (2, 3, Decimal("15.00")))
+        response = self.client_for(self.manager).delete(f"/api/menu-items/{self.deleted.pk}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summaries(), {customer.pk: (1, 1, Decimal("5.00")) for customer in self.customers})
+
+    def test_deleting_menu_items_in_bulk(self):
+        MenuItem.objects.filter(category=self.category).delete()
+        self.assertEqual(self.summaries(), {customer.pk: (0, 0, Decimal("0.00")) for customer in self.customers})
+
+
+class CompactSerializerTest(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username="customer")
+        self.context = {"request": SimpleNamespace(user=self.customer)}
+        category = Category.objects.create(slug="mains", title="Mains & \"Sides\"")
+        self.menu_items = [
+            MenuItem.objects.create(title=f"Item {i} \u00e9", price=Decimal(price), featured=i % 2 == 0, category=category)
+            for i, price in enumerate(["5.00", "0.10", "12.5", "9999.99"])
+        ]
+        for quantity, menu_item in enumerate(self.menu_items[:3], 1):
+            Cart.objects.create(user=self.customer, menu_item=menu_item, quantity=quantity, unit_price="1.00", price="1.00")
+
+    def assertSameJSON(self, serializer_class, queryset, rows, build):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=self.context).data)
+        self.assertEqual(JSONRenderer().render(build(rows(queryset), self.customer.pk)), expected)
+
+    def test_output_is_byte_identical(self):
+        self.assertSameJSON(MenuItemSerializer, MenuItem.objects.select_related("category").order_by("id"),
+                            compact.menu_item_rows, compact.menu_items)
+        self.assertSameJSON(CartSerializer, Cart.objects.select_related("menu_item__category").order_by("id"),
+                            compact.cart_rows, compact.cart_lines)
+
+    def test_list_endpoints(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.customer).key)
+        response = client.get("/api/cart/menu-items")
+        self.assertEqual([line["id"] for line in response.data["results"]], sorted(Cart.objects.values_list("id", flat=True)))
+        expected = CartSerializer(Cart.objects.select_related("menu_item__category").order_by("id")[:3], many=True, context=self.context).data
+        self.assertEqual(response.content, JSONRenderer().render({**response.data, "results": expected}))
+        response = client.get("/api/menu-items")
+        expected = MenuItemSerializer(MenuItem.objects.select_related("category").order_by("id")[:3], many=True, context=self.context).data
+        self.assertEqual(response.content, JSONRenderer().render({**response.data, "results": expected}))
+
+
+class FastJSONTest(TestCase):
+    payload = {
+        "message": "200 - OK.",
+        "data": [
+            {"id": 1, "total": Decimal("12.50"), "date": datetime.date(2023, 6, 14), "status": False, "delivery_crew_id": None},
+            {"id": 2, "total": Decimal("0.10"), "date": datetime.date(2024, 1, 2), "status": True, "delivery_crew_id": 7},
+        ],
+        "created": datetime.datetime(2023, 6, 14, 9, 30, 1, 250000, tzinfo=datetime.timezone.utc),
+        "naive": datetime.datetime(2023, 6, 14, 9, 30),
+        "time": datetime.time(9, 30),
+        "title": "Caf\u00e9 \"Lemon\" \\ \n\t\x01 \u2028\u2029 \U0001f34b",
+        "counts": {1: 2, "x": [1.5, -0.0, 10 ** 15]},
+        "rows": (1, 2),
+        "empty": {"list": [], "dict": {}},
+    }
+
+    def test_output_matches_json_renderer(self):
+        for media_type in [None, "application/json", "application/json; indent=2", "application/json; indent=4"]:
+            self.assertEqual(
+                FastJSONRenderer().render(self.payload, media_type),
+                JSONRenderer().render(self.payload, media_type),
+                media_type,
+            )
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+        self.assertEqual(FastJSONRenderer().render({"big": 2 ** 70}), JSONRenderer().render({"big": 2 ** 70}))
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_parser_matches_json_parser(self):
+        body = JSONRenderer().render(self.payload)
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for invalid in [b"{", b"[NaN]", b""]:
+            errors = []
+            for parser in [FastJSONParser(), JSONParser()]:
+                with self.assertRaises(ParseError) as raised:
+                    parser.parse(BytesIO(invalid))
+                errors.append(str(raised.exception))
+            self.assertEqual(errors[0], errors[1])
+        latin = {"encoding": "latin-1"}
+        self.assertEqual(FastJSONParser().parse(BytesIO('["caf\u00e9"]'.encode("latin-1")), None, latin), ["caf\u00e9"])
+
+    def test_api_responses(self):
+        customer = User.objects.create(username="customer")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=customer).key)
+        Order.objects.create(user=customer, total="12.50", date="2023-06-14")
+        response = client.get("/api/orders")
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        response = client.post("/api/cart/menu-items", '{"menu_item_id": 1, "quantity": 1}', content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+        response = client.post("/api/cart/menu-items", '{"menu_item_id": 1,', content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class SeedTest(TestCase):
+    def test_seed_is_consistent(self):
+        call_command("seed", categories=2, menu_items=10, customers=20, crew=2, carts=5, orders=50,
+                     date_from=datetime.date(2023, 6, 1), date_to=datetime.date(2023, 6, 30), batch_size=7, stdout=StringIO())
+
+        self.assertEqual(Order.objects.count(), 50)
+        self.assertEqual(User.objects.filter(groups__name="Delivery crew").count(), 2)
+        self.assertIsNotNone(authenticate(username="seed-customer-0", password="littlelemon"))
+        totals = dict(OrderItem.objects.values("order").annotate(total=Sum("price")).values_list("order", "total"))
+        self.assertEqual(totals, dict(Order.objects.values_list("id", "total")))
+        for summary in CartSummary.objects.all():
+            self.assertEqual(summary.subtotal, Cart.objects.filter(user=summary.user_id).aggregate(total=Sum("price"))["total"])
+
+        seeded = sorted(DailyMenuItemSales.objects.values_list("date", "menu_item_id", "quantity", "revenue"))
+        self.assertEqual(DailySales.objects.aggregate(orders=Sum("order_count"))["orders"], 50)
+        list(analytics.rebuild())
+        self.assertEqual(sorted(DailyMenuItemSales.objects.values_list("date", "menu_item_id", "quantity", "revenue")), seeded)
+
+        # A second run adds to the data rather than colliding with it.
+        call_command("seed", categories=1, menu_items=1, customers=1, managers=0, crew=0, carts=0, orders=1,
+                     prefix="again-", stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 51)
+        self.assertEqual(User.objects.create(username="after").pk, User.objects.aggregate(last=Max("id"))["last"])
+
+    def test_seeding_twice_with_the_same_prefix_is_refused(self):
+        options = dict(categories=1, menu_items=1, customers=1, managers=0, crew=0, carts=0, orders=1, stdout=StringIO())
+        call_command("seed", **options)
+        with self.assertRaisesMessage(CommandError, "--prefix 'seed-'"):
+            call_command("seed", **options)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create(username="customer")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.create(user=self.user).key)
+        category = Category.objects.create(slug="mains", title="Mains")
+        MenuItem.objects.create(title="Item", price="5.00", featured=False, category=category)
+
+    def test_routes_are_recorded_by_url_name(self):
+        self.client.get("/api/menu-items")
+        self.client.get("/api/menu-items")
+        metrics = registry.routes[("menu-items", "GET")]
+        self.assertEqual(metrics.count, 2)
+        self.assertEqual(metrics.statuses, {200: 2})
+        self.assertGreater(metrics.queries, 0)
+        self.assertGreater(metrics.serializer_time, 0)
+        self.assertGreater(metrics.response_bytes, 0)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.9"])
+    def test_metrics_endpoint(self):
+        self.client.get("/api/menu-items")
+        response = APIClient().get("/api/metrics", REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('littlelemon_request_duration_seconds_count{route="menu-items",method="GET"} 1', response.content.decode())
+        self.assertEqual(self.client.get("/api/metrics", REMOTE_ADDR="10.0.0.1").status_code, 403)
+
+    def test_metrics_endpoint_is_not_open_to_internal_ips(self):
+        cache.clear()
+        self.assertEqual(self.client.get("/api/metrics", REMOTE_ADDR="127.0.0.1").status_code, 403)
+        Group.objects.get_or_create(name="Manager")[0].user_set.add(self.user)
+        self.assertEqual(self.client.get("/api/metrics", REMOTE_ADDR="10.0.0.1").status_code, 200)
+
+
+"""
+Query budgets: the number of queries each endpoint may run, measured from cold
+caches (token, roles, catalog). An endpoint that goes over its budget, or that
+repeats one query shape 3 times in a request (the query profiler in RAISE mode),
+fails here. Every named route in urls.py must have at least one budget.
+"""
+QUERY_BUDGETS = {
+    ("menu-items", "GET"): 3,
+    ("menu-items", "POST"): 6,
+    ("menu-items-bulk", "POST"): 10,
+    ("menu-item", "GET"): 2,
+    ("menu-item", "PUT"): 7,
+    ("menu-item", "PATCH"): 6,
+    ("menu-item", "DELETE"): 10,
+    ("cart", "GET"): 4,
+    ("cart", "POST"): 6,
+    ("cart", "DELETE"): 5,
+    ("cart-batch", "POST"): 10,
+    ("cart-summary", "GET"): 2,
+    ("orders", "GET"): 3,
+    ("orders", "POST"): 18,
+    ("orders-export", "GET"): 4,
+    ("dispatch-pending", "GET"): 3,
+    ("dispatch-assign", "POST"): 7,
+    ("dispatch-auto-assign", "POST"): 8,
+    ("sales-daily", "GET"): 3,
+    ("sales-top-items", "GET"): 4,
+    ("order", "GET"): 3,
+    ("order", "PUT"): 6,
+    ("order", "PATCH"): 5,
+    ("order", "DELETE"): 11,
+    ("managers", "GET"): 2,
+    ("managers", "POST"): 6,
+    ("manager", "DELETE"): 5,
+    ("delivery-crew", "GET"): 2,
+    ("delivery-crew", "POST"): 6,
+    ("delivery-crew-member", "DELETE"): 5,
+    ("metrics", "GET"): 2,
+}
+
+
+@override_settings(QUERY_PROFILER={"SAMPLE_RATE": 1.0, "REPEAT_THRESHOLD": 3, "SLOW_QUERY_MS": 1000, "RAISE": True})
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create(username="manager")
+        self.crew = User.objects.create(username="crew")
+        self.customer = User.objects.create(username="customer")
+        Group.objects.create(name="Manager").user_set.add(self.manager)
+        Group.objects.create(name="Delivery crew").user_set.add(self.crew)
+
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        self.menu_items = [
+            MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=self.category) for i in range(5)
+        ]
+        customer = self.client_for(self.customer)
+        for menu_item in self.menu_items[:3]:
+            customer.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 2}, format="json")
+        customer.post("/api/orders", {"date": "2023-06-14"}, format="json")
+        for menu_item in self.menu_items[:3]:
+            customer.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 1}, format="json")
+        customer.post("/api/orders", {"date": "2023-06-15"}, format="json")
+        for menu_item in self.menu_items[:3]:
+            customer.post("/api/cart/menu-items", {"menu_item_id": menu_item.pk, "quantity": 1}, format="json")
+        self.orders = list(Order.objects.order_by("id"))
+        # User ids are reused between tests, cached roles must not outlive this one.
+        self.addCleanup(self.clear_caches)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+    def clear_caches(self):
+        cache.clear()
+        token_cache.clear()
+        menu_item_cache.clear()
+        price_index.clear()
+        load_table.clear()
+
+    def assertBudget(self, name, method, user, path, data=None, status=None):
+        self.clear_caches()
+        client = self.client_for(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method.lower())(path, data, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+        if status is not None:
+            self.assertEqual(response.status_code, status, path)
+        else:
+            self.assertLess(response.status_code, 400, path)
+        self.assertLessEqual(
+            len(queries), QUERY_BUDGETS[(name, method)],
+            f"{method} {path} ran {len(queries)} queries:\n" + "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        return response
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, {name for name, _ in QUERY_BUDGETS})
+
+    def test_menu_items(self):
+        self.assertBudget("menu-items", "GET", self.customer, "/api/menu-items")
+        self.assertBudget("menu-items", "POST", self.manager, "/api/menu-items",
+                          {"title": "New", "price": "6.00", "featured": False, "category_id": self.category.pk})
+        self.assertBudget("menu-items-bulk", "POST", self.manager, "/api/menu-items/bulk", [
+            {"title": f"Bulk {i}", "price": "6.00", "featured": False, "category_id": self.category.pk} for i in range(5)
+        ] + [
+            {"id": menu_item.pk, "title": menu_item.title, "price": "7.00", "featured": True, "category_id": self.category.pk}
+            for menu_item in self.menu_items
+        ])
+
+    def test_menu_item(self):
+        path = f"/api/menu-items/{self.menu_items[4].pk}"
+        self.assertBudget("menu-item", "GET", self.customer, path)
+        self.assertBudget("menu-item", "PUT", self.manager, path,
+                          {"title": "Renamed", "price": "6.00", "featured": True, "category_id": self.category.pk})
+        self.assertBudget("menu-item", "PATCH", self.manager, path, {"price": "6.50"})
+        self.assertBudget("menu-item", "DELETE", self.manager, path)
+
+    def test_cart(self):
+        self.assertBudget("cart", "GET", self.customer, "/api/cart/menu-items")
+        self.assertBudget("cart-summary", "GET", self.customer, "/api/cart/summary")
+        self.assertBudget("cart", "POST", self.customer, "/api/cart/menu-items", {"menu_item_id": self.menu_items[4].pk, "quantity": 1})
+        self.assertBudget("cart-batch", "POST", self.customer, "/api/cart/menu-items/batch", [
+            {"op": "set", "menu_item_id": self.menu_items[4].pk, "quantity": 2},
+            {"op": "increment", "menu_item_id": self.menu_items[3].pk, "quantity": 1},
+            {"op": "remove", "menu_item_id": self.menu_items[0].pk},
+        ])
+        self.assertBudget("cart", "DELETE", self.customer, "/api/cart/menu-items")
+
+    def test_orders(self):
+        self.assertBudget("orders", "GET", self.customer, "/api/orders")
+        self.assertBudget("orders", "POST", self.customer, "/api/orders", {"date": "2023-06-16"}, status=201)
+        self.assertBudget("orders-export", "GET", self.manager, "/api/orders/export")
+
+    def test_order(self):
+        path = f"/api/orders/{self.orders[0].pk}"
+        self.assertBudget("order", "GET", self.customer, path)
+        self.assertBudget("order", "PUT", self.manager, path, {"delivery_crew_id": self.crew.pk, "status": False})
+        self.assertBudget("order", "PATCH", self.crew, path, {"status": True})
+        self.assertBudget("order", "DELETE", self.manager, path)
+
+    def test_dispatch(self):
+        self.assertBudget("dispatch-auto-assign", "POST", self.manager, "/api/orders/dispatch/auto-assign", {})
+        self.assertBudget("dispatch-assign", "POST", self.manager, "/api/orders/dispatch/assign",
+                          {"order_ids": [order.pk for order in self.orders], "delivery_crew_id": self.crew.pk})
+        self.assertBudget("dispatch-pending", "GET", self.crew, "/api/orders/dispatch/pending")
+
+    def test_sales_reports(self):
+        self.assertBudget("sales-daily", "GET", self.manager, "/api/reports/sales/daily")
+        self.assertBudget("sales-top-items", "GET", self.manager, "/api/reports/sales/top-items")
+
+    def test_groups(self):
+        self.assertBudget("managers", "GET", self.manager, "/api/groups/manager/users")
+        self.assertBudget("managers", "POST", self.manager, "/api/groups/manager/users", {"username": "customer"}, status=201)
+        self.assertBudget("manager", "DELETE", self.manager, f"/api/groups/manager/users/{self.customer.pk}")
+        self.assertBudget("delivery-crew", "GET", self.manager, "/api/groups/delivery-crew/users")
+        self.assertBudget("delivery-crew", "POST", self.manager, "/api/groups/delivery-crew/users", {"username": "customer"}, status=201)
+        self.assertBudget("delivery-crew-member", "DELETE", self.manager, f"/api/groups/delivery-crew/users/{self.customer.pk}")
+
+    def test_metrics(self):
+        self.assertBudget("metrics", "GET", self.manager, "/api/metrics")
+
+
+class QueryProfilerTest(TestCase):
+    def test_fingerprint_collapses_literals(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "t"."id" = 12 AND "t"."title" = \'a b\''),
+            fingerprint('SELECT *  FROM "t" WHERE "t"."id" = 7 AND "t"."title" = \'c\''),
+        )
+        self.assertEqual(fingerprint('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s)'), 'SELECT * FROM "t" WHERE "t"."id" IN (...)')
+
+    def test_repeated_query_raises_with_call_site(self):
+        category = Category.objects.create(slug="mains", title="Mains")
+        ids = [MenuItem.objects.create(title=f"Item {i}", price="5.00", featured=False, category=category).pk for i in range(3)]
+        with self.assertRaisesMessage(RepeatedQueryError, "LittleLemonAPI/tests.py"):
+            with profile_queries(RAISE=True, REPEAT_THRESHOLD=3):
+                for pk in ids:
+                    MenuItem.objects.get(pk=pk)
+
+    def test_repeats_are_logged_without_raise(self):
+        with self.assertLogs("LittleLemonAPI.profiler", "WARNING") as logs:
+            with profile_queries(RAISE=False, REPEAT_THRESHOLD=2) as profile:
+                for pk in range(2):
+                    MenuItem.objects.filter(pk=pk).exists()
+            profile.report("test")
+        self.assertIn("repeated query route=test count=2", logs.output[0])
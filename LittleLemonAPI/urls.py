@@ -1,15 +1,38 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+if getattr(settings, 'ASYNC_READ_ENDPOINTS', False):
+    from . import async_views
+    menu_items_view = async_views.menu_items
+    cart_view = async_views.cart
+    orders_view = async_views.orders
+    single_order_view = async_views.single_order
+else:
+    menu_items_view = views.MenuItemsView.as_view()
+    cart_view = views.CartView.as_view()
+    orders_view = views.OrderView.as_view()
+    single_order_view = views.SingleOrderView.as_view()
+
 urlpatterns = [
-    path('menu-items', views.MenuItemsView.as_view()),
-    path('menu-items/<int:pk>', views.SingleMenuItemView.as_view()),
-    path('cart/menu-items', views.CartView.as_view()),
-    path('orders', views.OrderView.as_view()),
-    path('orders/<int:id>', views.SingleOrderView.as_view()),
-    path('groups/manager/users', views.managers),
-    path('groups/manager/users/<int:id>', views.manager_view),
-    path('groups/delivery-crew/users', views.delivery_crew),
-    path('groups/delivery-crew/users/<int:id>', views.delivery_crew_view),
+    path('menu-items', menu_items_view, name='menu-items'),
+    path('menu-items/bulk', views.menu_items_bulk, name='menu-items-bulk'),
+    path('menu-items/<int:pk>', views.SingleMenuItemView.as_view(), name='menu-item'),
+    path('cart/menu-items', cart_view, name='cart'),
+    path('cart/menu-items/batch', views.cart_batch, name='cart-batch'),
+    path('cart/summary', views.cart_summary_view, name='cart-summary'),
+    path('orders', orders_view, name='orders'),
+    path('orders/export', views.orders_export, name='orders-export'),
+    path('orders/dispatch/pending', views.PendingOrdersView.as_view(), name='dispatch-pending'),
+    path('orders/dispatch/assign', views.orders_assign, name='dispatch-assign'),
+    path('orders/dispatch/auto-assign', views.orders_auto_assign, name='dispatch-auto-assign'),
+    path('reports/sales/daily', views.sales_daily, name='sales-daily'),
+    path('reports/sales/top-items', views.sales_top_items, name='sales-top-items'),
+    path('orders/<int:id>', single_order_view, name='order'),
+    path('groups/manager/users', views.managers, name='managers'),
+    path('groups/manager/users/<int:id>', views.manager_view, name='manager'),
+    path('groups/delivery-crew/users', views.delivery_crew, name='delivery-crew'),
+    path('groups/delivery-crew/users/<int:id>', views.delivery_crew_view, name='delivery-crew-member'),
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,35 +1,67 @@
 from django.shortcuts import get_object_or_404
 
 from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, IsAdminUser
 
 from django.contrib.auth.models import User, Group
-from rest_framework.authtoken.models import Token
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle 
 
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 from rest_framework import status
 
 from .models import Category, MenuItem, Cart, Order, OrderItem
 from .serializers import MenuItemSerializer, CartSerializer, OrderSerializer, OrderItemSerializer 
+from .checkout import place_order
+from .idempotency import idempotent
+from .prices import price_index
+from .cache import catalog_cache, menu_item_cache
+from .roles import is_manager, is_delivery_crew, DELIVERY_CREW
+from .authentication import CachedTokenAuthentication
+from .filters import FilterSetFieldsBackend
+from .pagination import KeysetPagination
+from .search import FullTextSearchFilter
+from .permissions import IsManager, IsDeliveryCrew, IsMetricsScraper
+from .instrumentation import registry
+from .export import ndjson_lines, csv_lines
+from .menu_import import import_menu_items, parse_csv
+from .cart_batch import apply_operations, MAX_OPERATIONS
+from . import cart_summary
+from . import compact
+from . import analytics, dispatch
+from .sqlite import write_transaction
 
 from django.forms.models import model_to_dict
 
 from datetime import datetime, date
+from decimal import Decimal
 import logging
 
+import hashlib
 import json
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
 
+def compact_list(view, request, rows, build):
+    """
+    ListModelMixin.list through the compact serializers (compact.py): the same
+    filtering, pagination and output as the view's serializer, without model instances.
+    """
+    queryset = rows(view.filter_queryset(view.get_queryset()))
+    page = view.paginate_queryset(queryset)
+    if page is not None:
+        return view.get_paginated_response(build(page, request.user.pk)).data
+    return build(queryset, request.user.pk)
+
+
 # Create your views here.
 """
 MenuItems Endpoints:
@@ -45,19 +77,35 @@ Role:
 Purpose:
     - Get. Lists all menu items. Return a 200 – Ok HTTP status code.
 
+Listing:
+    - ?category= / ?featured= / ?price= / ?title= filters, ?ordering= (price, title)
+    and ?search= (full-text, word prefixes over title and category, see search.py).
+    Without ?ordering= items come in id order, or best match first when searching.
 """
 class MenuItemsView(generics.ListCreateAPIView):
-    queryset = MenuItem.objects.all()
+    queryset = MenuItem.objects.select_related('category')
     serializer_class = MenuItemSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
 
     ordering_fields = ['price', 'title']
-    filterset_fields = ['price', 'title']
+    ordering = ['id']
+    filterset_fields = ['category', 'featured', 'price', 'title']
     search_fields = ['category__title','title']
+    filter_backends = (FilterSetFieldsBackend, OrderingFilter, FullTextSearchFilter)
+
+    def list(self, request, *args, **kwargs):
+        data, hit = catalog_cache.get_or_set(request, lambda: compact_list(self, request, compact.menu_item_rows, compact.menu_items))
+        # MenuItemSerializer reports the requesting user, so it is stamped on the shared page per request.
+        user_id = request.user.pk
+        if isinstance(data, dict) and 'results' in data:
+            data = {**data, 'results': [{**item, 'user': user_id} for item in data['results']]}
+        else:
+            data = [{**item, 'user': user_id} for item in data]
+        return Response(data, headers={'X-Catalog-Cache': 'HIT' if hit else 'MISS'})
 
     def post(self, request):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             new_item = MenuItem()
             payload = self.request.data
             new_item.title = payload['title']
@@ -85,6 +133,36 @@ class MenuItemsView(generics.ListCreateAPIView):
         return [IsAuthenticatedOrReadOnly()]
 
 
+"""
+[[Bulk Menu Import Endpoint: /api/menu-items/bulk]]
+
+Role:
+    - Manager
+
+Purpose:
+    - POST. Creates or updates many menu items in one request.
+    The body is a JSON array of {id?, title, price, featured, category_id},
+    or a multipart upload with a CSV "file" using the same column names.
+    Rows with an id update that menu item, the others are created.
+    Returns 200 with one result per row, or 400 with the per-row errors and nothing written.
+"""
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def menu_items_bulk(request):
+    if 'file' in request.FILES:
+        rows = parse_csv(request.FILES['file'])
+    elif isinstance(request.data, list):
+        rows = request.data
+    else:
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+
+    results, success = import_menu_items(rows)
+    if success:
+        return Response({"message":"200 - Success.", "data": results}, status=status.HTTP_200_OK)
+    return Response({"message":"400 - Bad Request", "data": results}, status=status.HTTP_400_BAD_REQUEST)
+
+
 """
 MenuItems Endpoints:
 
@@ -102,13 +180,36 @@ Purpose:
 
 """
 class SingleMenuItemView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
-    queryset = MenuItem.objects.all()
+    queryset = MenuItem.objects.select_related('category')
     serializer_class = MenuItemSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().retrieve(request, *args, **kwargs)
+
+        pk = kwargs['pk']
+        version = catalog_cache.version()
+        cached = menu_item_cache.get(pk, version)
+        if cached is None:
+            data = dict(self.get_serializer(self.get_object()).data)
+            del data['user']
+            body = request.accepted_renderer.render(data)[1:]
+            cached = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+            # Skip the store if the item was written while it was being rendered.
+            if catalog_cache.version() == version:
+                menu_item_cache.set(pk, version, *cached)
+        body, digest = cached
+
+        user_id = b'null' if request.user.pk is None else str(request.user.pk).encode()
+        etag = f'"{digest}-{user_id.decode()}"'
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            return HttpResponseNotModified(headers={'ETag': etag})
+        return HttpResponse(b'{"user":' + user_id + b',' + body, content_type='application/json', headers={'ETag': etag})
 
     def put(self, request, pk):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             payload = self.request.data
             modified_menu_item = MenuItem.objects.get(pk=pk)
             modified_menu_item.title = payload['title']
@@ -121,7 +222,7 @@ class SingleMenuItemView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView
             return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)
 
     def patch(self, request, pk):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             payload = self.request.data
             modified_menu_item = MenuItem.objects.get(pk=pk)
 
@@ -140,7 +241,7 @@ class SingleMenuItemView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView
             return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)
 
     def delete(self, request, pk):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             menu_item = MenuItem.objects.filter(pk=pk)
             if menu_item:
                 menu_item.delete()
@@ -169,55 +270,69 @@ Role:
 Purpose: 
     - GET. Returns current items in the cart for the current user token
     - POST. Adds the menu item to the cart. Sets the authenticated user as the user id for these cart items
+        The line is priced at the menu item's current price. An unknown menu item is a 404,
+        a quantity below 1 a 400.
     - DELETE. Deletes all menu items created by the current user token
+    The GET listing also carries the cart "summary" (line_count, item_count, subtotal).
 """
 class CartView(generics.ListAPIView, generics.CreateAPIView, generics.DestroyAPIView):
     queryset = Cart.objects.all()
     serializer_class = CartSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
 
     def get_queryset(self):
-        return Cart.objects.all().filter(user=self.request.user)
+        return Cart.objects.select_related('menu_item__category').filter(user=self.request.user).order_by('id')
+
+    def list(self, request, *args, **kwargs):
+        data = compact_list(self, request, compact.cart_rows, compact.cart_lines)
+        data['summary'] = cart_summary.get_summary(request.user.id)
+        return Response(data)
 
     def post(self, request):
         if request.auth == None:
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
         user = request.user
-        token = Token.objects.filter(user=user)
-        if token:
-            new_cart = Cart()
-            payload = self.request.data
-            new_cart.user = user
-            new_cart.menu_item = MenuItem.objects.get(pk=payload['menu_item_id'])
-            new_cart.quantity = payload['quantity']
-            """
-            version-01:
-            new_cart.unit_price = payload['unit_price']
-            new_cart.price = payload['price']
-            """
-            """
-            version-02:
-            """
-            new_cart.unit_price = new_cart.menu_item.price
-            new_cart.price = new_cart.menu_item.price * new_cart.quantity
+        new_cart = Cart()
+        payload = self.request.data
+        try:
+            menu_item_id = int(payload['menu_item_id'])
+            quantity = int(payload['quantity'])
+        except (KeyError, TypeError, ValueError):
+            return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+        if quantity < 1:
+            return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+        # Priced from the in-process price index (prices.py), not a MenuItem fetch.
+        entry = price_index.get(menu_item_id)
+        if entry is None:
+            return Response({"message":"404 - Not found."}, status=status.HTTP_404_NOT_FOUND)
+        new_cart.user = user
+        new_cart.menu_item_id = menu_item_id
+        new_cart.quantity = quantity
+        """
+        version-01:
+        new_cart.unit_price = payload['unit_price']
+        new_cart.price = payload['price']
+        """
+        """
+        version-02:
+        """
+        new_cart.unit_price = entry.price
+        new_cart.price = entry.price * new_cart.quantity
+        with write_transaction():
             new_cart.save()
-            print(new_cart)
-            return Response({"message":"201 - Created."}, status=status.HTTP_201_CREATED)
-        else:
-            return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)
+            cart_summary.line_added(new_cart)
+        logger.debug("cart line added", extra={"user_id": new_cart.user_id, "menu_item_id": new_cart.menu_item_id, "quantity": new_cart.quantity})
+        return Response({"message":"201 - Created."}, status=status.HTTP_201_CREATED)
 
     def delete(self, request):
         if request.auth == None:
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
-        user = request.user
-        token = Token.objects.filter(user=user)
-        if token:
-            cart = Cart.objects.all().filter(user=self.request.user)
+        cart = Cart.objects.all().filter(user=self.request.user)
+        with write_transaction():
             cart.delete()
-            return Response({"message":"200 - Success."}, status=status.HTTP_200_OK)
-        else:
-            return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)
+            cart_summary.cleared(request.user.id)
+        return Response({"message":"200 - Success."}, status=status.HTTP_200_OK)
 
     def get_permissions(self):
         if(self.request.method in ['GET', 'POST', 'DELETE']):
@@ -225,6 +340,61 @@ class CartView(generics.ListAPIView, generics.CreateAPIView, generics.DestroyAPI
         return [IsAuthenticated()]
 
 
+"""
+[[Batch Cart Endpoint: /api/cart/menu-items/batch]]
+
+Role:
+    - Customer
+
+Purpose:
+    - POST. Applies a list of operations to the current user's cart in one transaction.
+    The body is a JSON array (at most 100) of {op, menu_item_id, quantity}, op being
+    "set" (the default; quantity 0 removes the line), "increment" (quantity may be
+    negative) or "remove". An item already in the cart is updated instead of failing.
+    Returns 200 with the updated cart and its summary, or 400 with the per-operation
+    errors and nothing written.
+"""
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CachedTokenAuthentication])
+def cart_batch(request):
+    rows = request.data
+    if not isinstance(rows, list) or len(rows) > MAX_OPERATIONS:
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+
+    results, success = apply_operations(request.user, rows)
+    if not success:
+        return Response({"message":"400 - Bad Request", "data": results}, status=status.HTTP_400_BAD_REQUEST)
+    rows = compact.cart_rows(Cart.objects.filter(user=request.user).order_by('id'))
+    context = {
+        "message":"200 - Success.",
+        "data": compact.cart_lines(rows, request.user.pk),
+        "summary": cart_summary.get_summary(request.user.id),
+    }
+    return Response(context, status=status.HTTP_200_OK)
+
+
+"""
+[[Cart Summary Endpoint: /api/cart/summary]]
+
+Role:
+    - Customer
+
+Purpose:
+    - GET. Returns line_count, item_count and subtotal of the current user's cart.
+    The summary is maintained as the cart changes, so this is a single row lookup.
+"""
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CachedTokenAuthentication])
+def cart_summary_view(request):
+    context = {
+        "message":"200 - OK.",
+        "data": cart_summary.get_summary(request.user.id)
+    }
+    return Response(context, status=status.HTTP_200_OK)
+
+
 """
 Order Management Endpoint: 
     - /api/orders
@@ -237,6 +407,9 @@ Purpose:
     - POST. Creates a new order item for the current user. 
         Gets current cart items from the cart endpoints and adds those items to the order items table. 
         Then deletes all items from the cart for this user.
+        An empty cart is a 400.
+        With an Idempotency-Key header, a retry of the same request returns the
+        stored response of the first one instead of placing another order.
 
 Role:
     - Manager
@@ -249,100 +422,63 @@ Role:
 
 Purpose:    
     - GET. Returns all orders with order items assigned to the delivery crew
+
+Listing:
+    - GET responses are keyset-paginated on (date, id), newest first.
+    ?ordering= (status, total, date), ?status= / ?total= filters, ?page_size=,
+    and ?cursor= taken from the "next" link of the previous page.
 """
 class OrderView(generics.ListCreateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     
     ordering_fields = ['status', 'total']
     filterset_fields = ['status', 'total']
     search_fields = ['status','date']    
+    filter_backends = (FilterSetFieldsBackend,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Order.objects.all().filter(user=self.request.user)
 
     def get(self, request):
-        if request.user.groups.filter(name='Manager').exists():
-            print("manager")
-            orders = Order.objects.all().values()
-            list_of_orders = []
-            for order in orders:
-                list_of_orders.append(order)
-            context = {
-                "message":"200 - OK.",
-                "data": list_of_orders
-            }
-            return Response(context, status=status.HTTP_200_OK)
-        elif request.user.groups.filter(name='Delivery crew').exists():
-            print("delivery crew")
-            
-            orders = Order.objects.all().values()
-            list_of_orders = []
-            for order in orders:
-                if order['delivery_crew_id'] != None:
-                    list_of_orders.append(order)
-            context = {
-                "message":"200 - OK.",
-                "data": list_of_orders
-            }
-            return Response(context, status=status.HTTP_200_OK)
+        if is_manager(request.user):
+            role = "manager"
+            orders = Order.objects.all()
+        elif is_delivery_crew(request.user):
+            role = "delivery crew"
+            orders = Order.objects.filter(delivery_crew__isnull=False)
+        elif request.auth:
+            role = "customer"
+            orders = Order.objects.filter(user=request.user)
         else:
-            user = request.user
-            token = Token.objects.filter(user=user)
-            if token:
-                print("customer")
-                order = Order.objects.all().filter(user=user).values()
-                context = {
-                    "message":"200 - OK.",
-                    "data": order
-                }
-                return Response(context, status=status.HTTP_200_OK)
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
 
+        logger.debug("orders listed", extra={"user_id": request.user.id, "role": role})
+        page = self.paginate_queryset(self.filter_queryset(orders).values())
+        return self.get_paginated_response(page)
+
     def post(self, request):
         if request.auth == None:
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
-        if request.user.groups.filter(name='Manager').exists() or request.user.groups.filter(name='Delivery crew').exists():
+        if is_manager(request.user) or is_delivery_crew(request.user):
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
-        user = request.user
-        token = Token.objects.filter(user=user)
-        if token:
-            new_order = Order()
-            new_order.user = user
+        return idempotent(request, lambda: self.place_order(request))
 
-            payload = self.request.data
-            
-            new_order.total = 0
-            #  It must be in YYYY-MM-DD format.
-            new_order.date = payload['date']
+    def place_order(self, request):
+        payload = self.request.data
+        #  It must be in YYYY-MM-DD format.
+        new_order, list_of_order_items = place_order(request.user, payload['date'])
+        if new_order is None:
+            return Response({"message":"400 - Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
 
-            new_order.save()
-
-            cart = Cart.objects.all().filter(user=user)
-    
-            list_of_order_items = []
-            for current_cart_item in cart:
-                new_order_item = OrderItem()
-
-                new_order_item.menu_item = current_cart_item.menu_item
-                new_order_item.quantity = current_cart_item.quantity
-                new_order_item.unit_price = current_cart_item.unit_price
-                new_order_item.price = current_cart_item.price
-                new_order_item.order = Order.objects.get(pk=new_order.id)
-                new_order_item.save()
-                list_of_order_items.append(model_to_dict(new_order_item))
-                new_order.total += new_order_item.price
-                current_cart_item.delete()
-            
-            new_order.save()
-            
-            context = {
-                    "message":"200 - OK.",
-                    "data": list_of_order_items
-            }
-            return Response(context, status=status.HTTP_201_CREATED)
+        context = {
+                "message":"200 - OK.",
+                "data": list_of_order_items
+        }
+        return Response(context, status=status.HTTP_201_CREATED)
 
     def get_permissions(self):
         if(self.request.method=='GET'):
@@ -389,31 +525,25 @@ class SingleOrderView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
 
     def get(self, request, id):
         if request.auth == None:
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
-        if request.user.groups.filter(name='Manager').exists() or request.user.groups.filter(name='Delivery crew').exists():
+        if is_manager(request.user) or is_delivery_crew(request.user):
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
-        user = request.user
-        token = Token.objects.filter(user=user)
-        if token:
-            order = get_object_or_404(Order, pk=id)
-            if user != order.user:
-                return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)    
-            else:
-                print(" --------------- ")
-                context = {
-                    "message":"200 - OK.",
-                    "data": model_to_dict(order)
-                }
-                return Response(context, status=status.HTTP_200_OK)
+        order = get_object_or_404(Order, pk=id)
+        if order.user_id != request.user.id:
+            return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)    
         else:
-            return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
+            context = {
+                "message":"200 - OK.",
+                "data": model_to_dict(order)
+            }
+            return Response(context, status=status.HTTP_200_OK)
 
     def put(self, request, id):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             order = get_object_or_404(Order, pk=id)
             if order:
                 payload = self.request.data
@@ -431,7 +561,7 @@ class SingleOrderView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
             return Response({"message":"401 - Forbidden."}, status=status.HTTP_401_UNAUTHORIZED)
 
     def patch(self, request, id):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             order = get_object_or_404(Order, pk=id)
             if order:
                 payload = self.request.data
@@ -443,7 +573,7 @@ class SingleOrderView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
                 return Response({"message":"200 - Success."}, status=status.HTTP_200_OK)
             else:
                 return Response({"message":"404 - Not found."}, status=status.HTTP_404_NOT_FOUND)    
-        elif request.user.groups.filter(name='Delivery crew').exists():
+        elif is_delivery_crew(request.user):
             order = get_object_or_404(Order, pk=id)
             if order:
                 payload = self.request.data
@@ -460,7 +590,7 @@ class SingleOrderView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
            return Response({"message":"403 - Unauthorized."}, status=status.HTTP_403_FORBIDDEN)
 
     def delete(self, request, id):
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             order = get_object_or_404(Order, pk=id)
             if order:
                 order.delete()
@@ -476,6 +606,214 @@ class SingleOrderView(generics.RetrieveUpdateAPIView, generics.DestroyAPIView):
         return [IsAuthenticated()]
 
 
+EXPORT_STATUS_VALUES = {'1': True, 'true': True, 'True': True, '0': False, 'false': False, 'False': False}
+
+
+"""
+[[Order Export Endpoint: /api/orders/export]]
+
+Role:
+    - Manager
+
+Purpose:
+    - GET. Streams every order with its order items, oldest first.
+    ?type=ndjson (default) emits one JSON order per line with an "items" list.
+    ?type=csv emits one row per order item, repeating the order columns.
+    Optional filters: ?date_from=YYYY-MM-DD, ?date_to=YYYY-MM-DD, ?status=0|1 (or true|false).
+    An unparsable filter is a 400.
+"""
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def orders_export(request):
+    orders = Order.objects.all()
+    try:
+        if 'date_from' in request.query_params:
+            orders = orders.filter(date__gte=Order._meta.get_field('date').to_python(request.query_params['date_from']))
+        if 'date_to' in request.query_params:
+            orders = orders.filter(date__lte=Order._meta.get_field('date').to_python(request.query_params['date_to']))
+    except DjangoValidationError:
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+    if 'status' in request.query_params:
+        order_status = EXPORT_STATUS_VALUES.get(request.query_params['status'])
+        if order_status is None:
+            return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+        orders = orders.filter(status=order_status)
+
+    if request.query_params.get('type', 'ndjson') == 'csv':
+        response = StreamingHttpResponse(csv_lines(orders), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="orders.csv"'
+    else:
+        response = StreamingHttpResponse(ndjson_lines(orders), content_type='application/x-ndjson')
+    return response
+
+
+"""
+[[Dispatch Endpoint: /api/orders/dispatch/pending]]
+
+Role:
+    - Delivery Crew
+
+Purpose:
+    - GET. Returns the orders assigned to the requesting crew member that are not delivered yet.
+
+Role:
+    - Manager
+
+Purpose:
+    - GET. Same, for the crew member given in ?delivery_crew_id=.
+
+Listing:
+    - Keyset-paginated like /api/orders, newest first; ?ordering=date for oldest first.
+"""
+class PendingOrdersView(generics.ListAPIView):
+    permission_classes = (IsAuthenticated, IsDeliveryCrew | IsManager)
+    authentication_classes = (CachedTokenAuthentication,)
+
+    ordering_fields = ['date']
+    pagination_class = KeysetPagination
+
+    def get(self, request):
+        if is_delivery_crew(request.user):
+            crew_id = request.user.id
+        else:
+            crew_id = request.query_params.get('delivery_crew_id', '')
+            if not crew_id.isdigit():
+                return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+        page = self.paginate_queryset(dispatch.pending_orders(crew_id).values())
+        return self.get_paginated_response(page)
+
+
+"""
+[[Dispatch Endpoints: /api/orders/dispatch/assign, /api/orders/dispatch/auto-assign]]
+
+Role:
+    - Manager
+
+Purpose:
+    - POST assign. Assigns every order in {"order_ids": [...]} to {"delivery_crew_id": ...}
+    in one update. Returns the assigned ids and the ids that were not found.
+    - POST auto-assign. Spreads the unassigned, undelivered orders (or only those in
+    an optional {"order_ids": [...]}) over the delivery crew, least loaded first.
+    Returns the order ids given to each crew member.
+"""
+def _order_ids(payload):
+    order_ids = payload.get('order_ids') if hasattr(payload, 'get') else None
+    if not isinstance(order_ids, list) or not all(isinstance(order_id, int) for order_id in order_ids):
+        return None
+    return order_ids
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def orders_assign(request):
+    order_ids = _order_ids(request.data)
+    crew_id = request.data.get('delivery_crew_id') if order_ids is not None else None
+    if not isinstance(crew_id, int) or not User.objects.filter(pk=crew_id, groups__name=DELIVERY_CREW).exists():
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+    assigned = dispatch.assign(order_ids, crew_id)
+    context = {
+        "message":"200 - Success.",
+        "data": {
+            "assigned": assigned,
+            "not_found": sorted(set(order_ids) - set(assigned)),
+        }
+    }
+    return Response(context, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def orders_auto_assign(request):
+    order_ids = None
+    if 'order_ids' in request.data:
+        order_ids = _order_ids(request.data)
+        if order_ids is None:
+            return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+    assignments = dispatch.auto_assign(order_ids)
+    context = {
+        "message":"200 - Success.",
+        "data": [
+            {"delivery_crew_id": crew_id, "order_ids": assigned}
+            for crew_id, assigned in assignments.items()
+        ]
+    }
+    return Response(context, status=status.HTTP_200_OK)
+
+
+"""
+[[Sales Report Endpoints: /api/reports/sales/daily, /api/reports/sales/top-items]]
+
+Role:
+    - Manager
+
+Purpose:
+    - GET daily. Orders, items sold and revenue per day, oldest first, with the range totals.
+    - GET top-items. The best selling menu items by quantity (?limit=, default 10).
+    Both take ?date_from=YYYY-MM-DD and ?date_to=YYYY-MM-DD and read only the
+    sales rollups (analytics.py), never the orders.
+"""
+def _report_range(request):
+    date_field = Order._meta.get_field('date')
+    return (
+        date_field.to_python(request.query_params.get('date_from')),
+        date_field.to_python(request.query_params.get('date_to')),
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def sales_daily(request):
+    try:
+        date_from, date_to = _report_range(request)
+    except DjangoValidationError:
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+    days = analytics.daily_sales(date_from, date_to)
+    context = {
+        "message":"200 - OK.",
+        "totals": {
+            "order_count": sum(day['order_count'] for day in days),
+            "item_count": sum(day['item_count'] for day in days),
+            "revenue": sum((day['revenue'] for day in days), Decimal('0.00')),
+        },
+        "data": days,
+    }
+    return Response(context, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def sales_top_items(request):
+    try:
+        date_from, date_to = _report_range(request)
+        limit = int(request.query_params.get('limit', 10))
+    except (DjangoValidationError, ValueError):
+        return Response({"message":"400 - Bad Request"}, status.HTTP_400_BAD_REQUEST)
+    context = {
+        "message":"200 - OK.",
+        "data": analytics.top_menu_items(date_from, date_to, max(1, min(limit, 100))),
+    }
+    return Response(context, status=status.HTTP_200_OK)
+
+"""
+[[Metrics Endpoint: /api/metrics]]
+
+Role:
+    - Manager, or any caller from METRICS_ALLOWED_IPS (the Prometheus scraper)
+
+Purpose:
+    - GET. Per-route request metrics in the Prometheus text format (see instrumentation.py).
+"""
+@api_view(['GET'])
+@permission_classes([IsMetricsScraper | IsManager])
+@authentication_classes([CachedTokenAuthentication])
+def metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 """
 [[User Group Management Endpoints: /api/groups/manager/users]]
 
@@ -492,7 +830,7 @@ Purpose:
 """
 @api_view(['GET','POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 def managers(request):
     if request.method == 'GET':
         managers = User.objects.filter(groups__name="Manager").values('username', 'email')
@@ -503,7 +841,7 @@ def managers(request):
         return Response(context, status=status.HTTP_200_OK)
     
     if request.method == 'POST':
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             username = request.data['username']
             if username:
                 user = get_object_or_404(User, username=username)
@@ -517,9 +855,9 @@ def managers(request):
 
 @api_view(['DELETE',])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 def manager_view(request, id):
-    if request.user.groups.filter(name='Manager').exists():
+    if is_manager(request.user):
         user = get_object_or_404(User, pk=id)
         if user:
             managers = Group.objects.get(name="Manager")
@@ -546,7 +884,7 @@ Purpose:
 """
 @api_view(['GET','POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 def delivery_crew(request):
     if request.method == 'GET':
         delivery_crew_members = User.objects.filter(groups__name="Delivery crew").values('username', 'email')
@@ -557,7 +895,7 @@ def delivery_crew(request):
         return Response(context, status=status.HTTP_200_OK)
     
     if request.method == 'POST':
-        if request.user.groups.filter(name='Manager').exists():
+        if is_manager(request.user):
             username = request.data['username']
             if username:
                 user = get_object_or_404(User, username=username)
@@ -572,9 +910,9 @@ def delivery_crew(request):
         
 @api_view(['DELETE',])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 def delivery_crew_view(request, id):
-    if request.user.groups.filter(name='Manager').exists():
+    if is_manager(request.user):
         user = get_object_or_404(User, pk=id)
         if user:
             delivery_crew_members = Group.objects.get(name="Delivery crew")